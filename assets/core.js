@@ -0,0 +1,5 @@
+require('./taskTracker').trackTasks(window)
+window.testability = require('testability.js')
+window.instrumentBrowser = require('testability-browser-bindings')
+window.instrumentBrowser(window, "testability_config" in window ? window.testability_config : {})
+window.seleniumtestabilityready = true
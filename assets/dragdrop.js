@@ -0,0 +1 @@
+window.simulateDragDrop = require('./simulateDragAndDrop').simulateDragDrop;
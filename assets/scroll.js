@@ -0,0 +1,2 @@
+window.scrollStop = require('./scrollStop').scrollStop
+window.scrollStop()
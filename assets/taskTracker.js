@@ -0,0 +1,229 @@
+// Keeps track of the asyncronous tasks so that they can be reported when waiting for testability times out.
+// This wraps fetch, XMLHttpRequest and setTimeout on top of testability's own bindings, which adds one extra
+// function call and a bookkeeping entry to each of those calls. Only tasks testability itself would wait for are
+// reported: timeouts longer than maxTimeout and blacklisted requests are left out. Waits the SUT adds to testability
+// directly are not visible here.
+exports.trackTasks = function(window) {
+  var tasks = {};
+  var nextId = 0;
+
+  function start(type, details) {
+    var id = ++nextId;
+    details.type = type;
+    details.started = Date.now();
+    tasks[id] = details;
+    return id;
+  }
+
+  function end(id) {
+    delete tasks[id];
+  }
+
+  var requests = {};
+  function pattern(url) {
+    var parsed;
+    try {
+      parsed = new window.URL(url, window.location.href);
+    } catch (e) {
+      return String(url).split('?')[0];
+    }
+    var path = parsed.pathname.split('/').map(function(segment) {
+      return /^(\d+|[0-9a-fA-F-]{16,})$/.test(segment) ? ':id' : segment;
+    }).join('/');
+    return parsed.origin === window.location.origin ? path : parsed.origin + path;
+  }
+
+  function requestDone(id, failed) {
+    var task = tasks[id];
+    end(id);
+    if (!task) {
+      return;
+    }
+    var urlPattern = pattern(task.url);
+    var key = task.method + ' ' + urlPattern;
+    var duration = Date.now() - task.started;
+    var stats = requests[key];
+    if (!stats) {
+      stats = requests[key] = { method: task.method, pattern: urlPattern, count: 0, failed: 0, total: 0, min: duration, max: duration, reported: 0 };
+    }
+    stats.count += 1;
+    stats.total += duration;
+    stats.min = Math.min(stats.min, duration);
+    stats.max = Math.max(stats.max, duration);
+    if (failed) {
+      stats.failed += 1;
+    }
+    if (task.reported) {
+      stats.reported += 1;
+    }
+  }
+
+  function describe(element) {
+    if (!element || !element.tagName) {
+      return String(element);
+    }
+    var desc = element.tagName.toLowerCase();
+    if (element.id) {
+      desc += '#' + element.id;
+    } else if (typeof element.className === 'string' && element.className) {
+      desc += '.' + element.className.trim().split(/\s+/).join('.');
+    }
+    return desc;
+  }
+
+  if (window.fetch) {
+    var originalFetch = window.fetch;
+    window.fetch = function(input, init) {
+      var url = typeof input === 'string' ? input : (input && input.url) || String(input);
+      var method = (init && init.method) || (input && input.method) || 'GET';
+      var id = start('fetch', { url: url, method: method.toUpperCase() });
+      return originalFetch.apply(this, arguments).then(function(response) {
+        requestDone(id, !response.ok);
+        return response;
+      }, function(error) {
+        requestDone(id, true);
+        throw error;
+      });
+    };
+  }
+
+  var xhr = window.XMLHttpRequest && window.XMLHttpRequest.prototype;
+  if (xhr) {
+    var originalOpen = xhr.open;
+    var originalSend = xhr.send;
+    xhr.open = function(method, url) {
+      this.seleniumtestabilityrequest = { url: String(url), method: String(method).toUpperCase() };
+      return originalOpen.apply(this, arguments);
+    };
+    xhr.send = function() {
+      var request = this.seleniumtestabilityrequest || { url: '', method: 'GET' };
+      var id = start('xhr', { url: request.url, method: request.method });
+      this.addEventListener('loadend', function() {
+        requestDone(id, this.status === 0 || this.status >= 400);
+      });
+      return originalSend.apply(this, arguments);
+    };
+  }
+
+  var timers = {};
+  var originalSetTimeout = window.setTimeout;
+  var originalClearTimeout = window.clearTimeout;
+  window.setTimeout = function(callback, delay) {
+    if (typeof callback !== 'function') {
+      return originalSetTimeout.apply(window, arguments);
+    }
+    var args = Array.prototype.slice.call(arguments, 2);
+    var id = start('timeout', { delay: delay || 0 });
+    var handle = originalSetTimeout.call(window, function() {
+      end(id);
+      delete timers[handle];
+      return callback.apply(this, args);
+    }, delay);
+    timers[handle] = id;
+    return handle;
+  };
+  window.clearTimeout = function(handle) {
+    if (handle in timers) {
+      end(timers[handle]);
+      delete timers[handle];
+    }
+    return originalClearTimeout.apply(window, arguments);
+  };
+
+  var running = {};
+  function trackAnimation(type, nameOf, startEvents, endEvents) {
+    function key(event) {
+      return type + ':' + nameOf(event) + ':' + describe(event.target);
+    }
+    startEvents.forEach(function(name) {
+      window.document.addEventListener(name, function(event) {
+        var k = key(event);
+        if (!(k in running)) {
+          running[k] = start(type, { name: nameOf(event), target: describe(event.target) });
+        }
+      }, true);
+    });
+    endEvents.forEach(function(name) {
+      window.document.addEventListener(name, function(event) {
+        var k = key(event);
+        if (k in running) {
+          end(running[k]);
+          delete running[k];
+        }
+      }, true);
+    });
+  }
+  trackAnimation('animation', function(event) { return event.animationName; }, ['animationstart'], ['animationend', 'animationcancel']);
+  trackAnimation('transition', function(event) { return event.propertyName; }, ['transitionrun'], ['transitionend', 'transitioncancel']);
+
+  var scrolling = null;
+  window.addEventListener('scroll', function() {
+    if (scrolling === null) {
+      scrolling = { id: start('scroll', { x: window.scrollX, y: window.scrollY }) };
+    } else {
+      originalClearTimeout.call(window, scrolling.handle);
+    }
+    tasks[scrolling.id].x = window.scrollX;
+    tasks[scrolling.id].y = window.scrollY;
+    scrolling.handle = originalSetTimeout.call(window, function() {
+      end(scrolling.id);
+      scrolling = null;
+    }, 66);
+  }, false);
+
+  function blacklisted(task) {
+    var blacklist = (window.testability_config && window.testability_config.blacklist) || [];
+    return blacklist.some(function(entry) {
+      if (entry.method && String(entry.method).toUpperCase() !== task.method) {
+        return false;
+      }
+      try {
+        return new RegExp(entry.url).test(task.url);
+      } catch (e) {
+        return false;
+      }
+    });
+  }
+
+  function waitedFor(task) {
+    if (task.type === 'timeout') {
+      var config = window.testability_config || {};
+      return task.delay <= (config.maxTimeout === undefined ? 5000 : config.maxTimeout);
+    }
+    if (task.url !== undefined) {
+      return !blacklisted(task);
+    }
+    return true;
+  }
+
+  window.seleniumtestabilitytasks = {
+    // Requests pending for at least slowAfter milliseconds are marked slow, each only the first time it is seen.
+    pending: function(slowAfter) {
+      var now = Date.now();
+      return Object.keys(tasks).filter(function(id) {
+        return waitedFor(tasks[id]);
+      }).map(function(id) {
+        var task = Object.assign({}, tasks[id]);
+        delete task.reported;
+        task.age = now - task.started;
+        if (task.url !== undefined) {
+          task.pattern = pattern(task.url);
+          if (slowAfter != null && task.age >= slowAfter && !tasks[id].reported) {
+            tasks[id].reported = true;
+            task.slow = true;
+          }
+        }
+        return task;
+      });
+    },
+    requests: function(reset) {
+      var ret = Object.keys(requests).map(function(key) {
+        return Object.assign({}, requests[key]);
+      });
+      if (reset) {
+        requests = {};
+      }
+      return ret;
+    }
+  };
+};
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+import re
+from collections import deque
+from heapq import merge
+from itertools import count
+from os import stat
+from threading import Event, Lock, Thread
+from time import time
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+FIREFOX_LOG_LINE = re.compile(
+    r"^(?P<source>JavaScript|console)[\s.](?P<level>warn(?:ing)?|debug|trace|log|error|info):\s(?P<message>(?!resource:).*)$"
+)
+LEVEL_LOOKUP = {
+    "log": "INFO",
+    "warn": "WARN",
+    "warning": "WARN",
+    "error": "SEVERE",
+    "info": "INFO",
+    "trace": "SEVERE",
+    "debug": "DEBUG",
+}
+SOURCE_LOOKUP = {"JavaScript": "javascript", "console": "console-api"}
+LEVEL_ORDER = {"ALL": 0, "DEBUG": 10, "INFO": 20, "WARN": 30, "WARNING": 30, "SEVERE": 40}
+
+LogEntry = Dict
+
+
+class LogTail:
+    """
+    Follows a log file and returns only the lines that have been appended since the previous read.
+
+    Position is tracked as a byte offset so that already seen content is never read again. An unterminated last line
+    is held back until it is completed, and if the file is truncated or replaced, reading starts again from the beginning.
+    The same tail can be shared between threads, each new line is returned to only one of the readers.
+    """
+
+    def __init__(self: "LogTail", path: str) -> None:
+        self.path = path
+        self.offset = 0
+        self.partial = b""
+        self.inode: Optional[int] = None
+        self._lock = Lock()
+
+    def lines(self: "LogTail") -> List[str]:
+        with self._lock:
+            return list(self._read())
+
+    def _read(self: "LogTail") -> Iterator[str]:
+        try:
+            st = stat(self.path)
+        except FileNotFoundError:
+            return
+        if self.inode is not None and (st.st_ino != self.inode or st.st_size < self.offset):
+            self.offset = 0
+            self.partial = b""
+        self.inode = st.st_ino
+        if st.st_size == self.offset:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            for raw in f:
+                self.offset += len(raw)
+                if not raw.endswith(b"\n"):
+                    self.partial += raw
+                    break
+                line = self.partial + raw
+                self.partial = b""
+                yield line.rstrip(b"\r\n").decode("utf-8", "replace")
+
+
+def level_value(level: Optional[str]) -> int:
+    """
+    Returns numeric value of ``level`` that can be used to compare severities. None means all levels.
+    """
+    if not level:
+        return 0
+    try:
+        return LEVEL_ORDER[level.upper()]
+    except KeyError:
+        raise ValueError("Unknown log level: {}, valid options: {}".format(level, ", ".join(LEVEL_ORDER)))
+
+
+def filter_entries(entries: Iterable[LogEntry], level: Optional[str] = None, source: Optional[str] = None) -> Iterator[LogEntry]:
+    """
+    Yields ``entries`` that are at least at ``level`` and, if given, originate from ``source``.
+    """
+    minimum = level_value(level)
+    for entry in entries:
+        if LEVEL_ORDER.get(entry.get("level", ""), 0) >= minimum and (source is None or entry.get("source") == source):
+            yield entry
+
+
+def parse_firefox_log(lines: Iterable[str], level: Optional[str] = None, source: Optional[str] = None) -> Iterator[LogEntry]:
+    """
+    Parses console lines from geckodriver log into entries in the same format as chromedriver returns them.
+
+    Firefox writes console output to geckodriver log without timestamps, like ``console.error: "message"``, so
+    entries get the time the lines are read as their timestamp. Lines below ``level`` or not from ``source`` are
+    skipped before entries are created.
+    """
+    now = int(time() * 1000)
+    minimum = level_value(level)
+    match = FIREFOX_LOG_LINE.match
+    for line in lines:
+        matches = match(line)
+        if matches:
+            entry_level = LEVEL_LOOKUP[matches.group("level")]
+            if LEVEL_ORDER[entry_level] < minimum:
+                continue
+            entry_source = SOURCE_LOOKUP[matches.group("source")]
+            if source is not None and entry_source != source:
+                continue
+            yield {"level": entry_level, "message": matches.group("message"), "source": entry_source, "timestamp": now}
+
+
+def parse_quotas(quotas: Optional[str]) -> Dict[str, int]:
+    """
+    Parses per level quotas from a string like ``DEBUG:100 INFO:1000`` into a dictionary.
+    """
+    ret = {}
+    for item in (quotas or "").split():
+        level, _, value = item.partition(":")
+        level_value(level)
+        ret[level.upper()] = int(value)
+    return ret
+
+
+class LogStore:
+    """
+    Fixed capacity store for browser log entries.
+
+    Each level is kept in its own ring buffer which can be limited with ``quotas``. Levels without a quota are only
+    limited by the total ``capacity``. When the store is full, the oldest entry of the lowest level is dropped first so
+    that more severe entries are retained for as long as possible.
+    """
+
+    def __init__(self: "LogStore", capacity: int, quotas: Optional[Dict[str, int]] = None) -> None:
+        self.capacity = capacity
+        self.quotas = {("WARN" if level == "WARNING" else level): value for level, value in (quotas or {}).items()}
+        self.dropped = 0
+        self._levels: Dict[str, Deque[Tuple[int, LogEntry]]] = {}
+        self._size = 0
+        self._sequence = count()
+        self._lock = Lock()
+
+    def __len__(self: "LogStore") -> int:
+        return self._size
+
+    def _buffer(self: "LogStore", level: str) -> Deque[Tuple[int, LogEntry]]:
+        if level not in self._levels:
+            self._levels[level] = deque(maxlen=self.quotas.get(level))
+        return self._levels[level]
+
+    def _evict(self: "LogStore") -> None:
+        for level in sorted(self._levels, key=lambda level: LEVEL_ORDER.get(level, 0)):
+            if self._levels[level]:
+                self._levels[level].popleft()
+                self._size -= 1
+                self.dropped += 1
+                return
+
+    def add(self: "LogStore", entries: Iterable[LogEntry]) -> None:
+        with self._lock:
+            for entry in entries:
+                level = entry.get("level", "")
+                buffer = self._buffer("WARN" if level == "WARNING" else level)
+                if len(buffer) == buffer.maxlen:
+                    self._size -= 1
+                    self.dropped += 1
+                buffer.append((next(self._sequence), entry))
+                self._size += 1
+                if self._size > self.capacity:
+                    self._evict()
+
+    def snapshot(
+        self: "LogStore", level: Optional[str] = None, source: Optional[str] = None, clear: bool = False
+    ) -> List[LogEntry]:
+        """
+        Returns stored entries in the order they were added.
+        """
+        with self._lock:
+            ordered = (entry for _, entry in merge(*self._levels.values(), key=lambda item: item[0]))
+            entries = list(filter_entries(ordered, level, source))
+            if clear:
+                self._levels.clear()
+                self._size = 0
+        return entries
+
+
+class LogCollector(Thread):
+    """
+    Background thread that periodically drains browser logs from ``source`` into a ``LogStore`` so that driver side
+    buffers do not overflow between the calls made by the tests.
+    """
+
+    def __init__(
+        self: "LogCollector", source: Callable[[], Iterable[LogEntry]], interval: float, store: LogStore, logger: Any
+    ) -> None:
+        Thread.__init__(self, name="SeleniumTestabilityLogCollector", daemon=True)
+        self.source = source
+        self.interval = interval
+        self.logger = logger
+        self.store = store
+        self._stopped = Event()
+
+    def run(self: "LogCollector") -> None:
+        while not self._stopped.wait(self.interval):
+            self.drain()
+
+    def drain(self: "LogCollector") -> None:
+        try:
+            new_entries = list(self.source())
+        except Exception as e:
+            self.logger.warning("Stopping log collector: {}".format(e))
+            self._stopped.set()
+            return
+        self.store.add(new_entries)
+
+    def stop(self: "LogCollector", drain: bool = True) -> None:
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        if self.is_alive():
+            self.join()
+        if drain:
+            self.drain()
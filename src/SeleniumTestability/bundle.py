@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+from hashlib import sha1
+from os import environ, stat
+from robot.utils import is_truthy
+from threading import Lock
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+BUNDLE_MARKER = "/* BUNDLE */"
+# Bundles are read from the disk only once per process. When developing the javascript itself, setting
+# SELENIUMTESTABILITY_JS_AUTO_RELOAD environment variable makes bundles to be read again whenever they change.
+AUTO_RELOAD = is_truthy(environ.get("SELENIUMTESTABILITY_JS_AUTO_RELOAD", False))
+
+
+class BundleInfo(NamedTuple):
+    hits: int
+    misses: int
+    mtime: float
+    digest: str
+
+
+class JavascriptBundle:
+    """
+    Keeps the content of a javascript bundle in memory so that it only has to be read from the disk once per process.
+
+    If ``auto_reload`` is enabled, modification time of the file is checked on each access and the bundle is read again
+    if it has changed. This is only useful during development of the bundle itself.
+    """
+
+    def __init__(self: "JavascriptBundle", path: str, auto_reload: bool = False) -> None:
+        self.path = path
+        self.auto_reload = auto_reload
+        self.hits = 0
+        self.misses = 0
+        self.mtime = 0.0
+        self.digest = ""
+        self._script: Optional[str] = None
+        self._rendered: Dict[str, str] = {}
+        self._lock = Lock()
+
+    def _load(self: "JavascriptBundle") -> str:
+        self.misses += 1
+        self.mtime = stat(self.path).st_mtime
+        with open(self.path, "r") as f:
+            buf = f.read()
+        digest = sha1(buf.encode("utf-8")).hexdigest()
+        if digest != self.digest or self._script is None:
+            self.digest = digest
+            self._script = "{};".format(buf)
+            self._rendered = {}
+        return self._script
+
+    @property
+    def script(self: "JavascriptBundle") -> str:
+        """
+        Returns the bundle as a script that can be passed to ``execute_script``.
+        """
+        with self._lock:
+            if self._script is None or (self.auto_reload and stat(self.path).st_mtime != self.mtime):
+                return self._load()
+            self.hits += 1
+            return self._script
+
+    def render(self: "JavascriptBundle", template: str) -> str:
+        """
+        Returns ``template`` where ``BUNDLE_MARKER`` has been replaced with the bundle. Rendered scripts are cached until
+        the bundle itself changes.
+        """
+        script = self.script
+        if template not in self._rendered:
+            self._rendered[template] = template.replace(BUNDLE_MARKER, script)
+        return self._rendered[template]
+
+    def info(self: "JavascriptBundle") -> BundleInfo:
+        return BundleInfo(self.hits, self.misses, self.mtime, self.digest)
+
+
+class CombinedBundle:
+    """
+    Several bundles that are injected together with a single script, in the given order.
+    """
+
+    def __init__(self: "CombinedBundle", bundles: List[JavascriptBundle]) -> None:
+        self.bundles = bundles
+        self._digests: Tuple[str, ...] = ()
+        self._script = ""
+        self._rendered: Dict[str, str] = {}
+
+    @property
+    def script(self: "CombinedBundle") -> str:
+        scripts = [bundle.script for bundle in self.bundles]
+        digests = tuple(bundle.digest for bundle in self.bundles)
+        if digests != self._digests:
+            self._digests = digests
+            self._script = "".join(scripts)
+            self._rendered = {}
+        return self._script
+
+    def render(self: "CombinedBundle", template: str) -> str:
+        script = self.script
+        if template not in self._rendered:
+            self._rendered[template] = template.replace(BUNDLE_MARKER, script)
+        return self._rendered[template]
+
+    def info(self: "CombinedBundle") -> BundleInfo:
+        return BundleInfo(
+            sum(bundle.hits for bundle in self.bundles),
+            sum(bundle.misses for bundle in self.bundles),
+            max(bundle.mtime for bundle in self.bundles),
+            sha1("".join(bundle.digest for bundle in self.bundles).encode("utf-8")).hexdigest(),
+        )
+
+
+_bundles: Dict[str, JavascriptBundle] = {}
+
+
+def get_bundle(path: str) -> JavascriptBundle:
+    """
+    Returns process wide cached bundle for given ``path``. See ``AUTO_RELOAD`` for reloading changed bundles.
+    """
+    if path not in _bundles:
+        _bundles[path] = JavascriptBundle(path, AUTO_RELOAD)
+    return _bundles[path]
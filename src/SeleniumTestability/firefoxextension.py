@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+import json
+from pathlib import Path
+from zipfile import ZipFile, ZIP_DEFLATED
+
+EXTENSION_ID = "seleniumtestability@marketsquare.github.io"
+
+MANIFEST = {
+    "manifest_version": 2,
+    "name": "SeleniumTestability",
+    "version": "1.0",
+    "description": "Instruments every document for SeleniumTestability",
+    "browser_specific_settings": {"gecko": {"id": EXTENSION_ID}},
+    "content_scripts": [{"matches": ["<all_urls>"], "js": ["content.js"], "run_at": "document_start", "all_frames": True}],
+}
+
+# Content scripts run in an isolated world, so the bundle is added into the page as a script element which is
+# executed synchronously before any of the page's own scripts.
+CONTENT_SCRIPT = """(function() {
+  var script = document.createElement('script');
+  script.textContent = %s;
+  (document.head || document.documentElement).appendChild(script);
+  script.remove();
+})();
+"""
+
+
+def build_extension(source: str, path: Path) -> Path:
+    """
+    Writes a WebExtension into ``path`` that evaluates ``source`` in every document at document_start.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with ZipFile(str(path), "w", ZIP_DEFLATED) as xpi:
+        xpi.writestr("manifest.json", json.dumps(MANIFEST))
+        xpi.writestr("content.js", CONTENT_SCRIPT % json.dumps(source))
+    return path
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+from selenium.webdriver import FirefoxProfile
+from threading import Lock
+from typing import Any, Callable, Dict, Optional
+
+
+class CachedFirefoxProfile(FirefoxProfile):
+    """
+    FirefoxProfile that keeps its zipped and base64 encoded form in memory until preferences are changed, so the
+    profile directory is packaged only once no matter how many browsers are opened with it.
+    """
+
+    def __init__(self: "CachedFirefoxProfile", profile_directory: Optional[str] = None) -> None:
+        FirefoxProfile.__init__(self, profile_directory)
+        self._encoded: Optional[str] = None
+
+    def set_preference(self: "CachedFirefoxProfile", key: str, value: Any) -> None:
+        self._encoded = None
+        FirefoxProfile.set_preference(self, key, value)
+
+    def update_preferences(self: "CachedFirefoxProfile") -> None:
+        self._encoded = None
+        FirefoxProfile.update_preferences(self)
+
+    @property
+    def encoded(self: "CachedFirefoxProfile") -> str:
+        if self._encoded is None:
+            self._encoded = FirefoxProfile.encoded.fget(self)  # type: ignore
+        return self._encoded
+
+
+_profiles: Dict[str, FirefoxProfile] = {}
+_lock = Lock()
+
+
+def get_profile(key: str, factory: Callable[[], FirefoxProfile]) -> FirefoxProfile:
+    """
+    Returns process wide cached profile for ``key``, creating it with ``factory`` if needed.
+    """
+    with _lock:
+        if key not in _profiles:
+            _profiles[key] = factory()
+        return _profiles[key]
@@ -2,10 +2,50 @@
 JS_LOOKUP = {
     "wait_for_testability": """
         var readyCallback = arguments[arguments.length - 1];
+        var token = arguments.length > 1 ? arguments[0] : null;
+        if (window.testability === undefined || (token && window.seleniumtestabilitytoken !== token)) {
+            readyCallback(null);
+            return;
+        }
         window.testability.when.ready(function() {
             readyCallback(true)
         });
     """,
+    "instrument_and_wait": """
+        var readyCallback = arguments[arguments.length - 1];
+        if (window.seleniumtestabilityready !== true) {
+            if (arguments[0]) {
+                window.testability_config = arguments[0];
+            }
+            /* BUNDLE */
+            window.seleniumtestabilitytoken = arguments[1];
+        }
+        window.testability.when.ready(function() {
+            readyCallback(window.seleniumtestabilitytoken || true)
+        });
+    """,
+    "testability_idle": """
+        if (window.testability === undefined || (arguments[0] && window.seleniumtestabilitytoken !== arguments[0])) {
+            return null;
+        }
+        var idle = false;
+        window.testability.when.ready(function() {
+            idle = true;
+        });
+        return idle;
+    """,
+    "pending_tasks": """
+        if (window.seleniumtestabilitytasks === undefined) {
+            return null;
+        }
+        return window.seleniumtestabilitytasks.pending(arguments[0]);
+    """,
+    "request_stats": """
+        if (window.seleniumtestabilitytasks === undefined) {
+            return null;
+        }
+        return window.seleniumtestabilitytasks.requests(arguments[0]);
+    """,
     "wait_for_document_ready": """
         var readyCallback = arguments[arguments.length - 1];
         var checkReadyState=function() {
@@ -16,11 +56,40 @@ JS_LOOKUP = {
     "is_installed": """
         return window.seleniumtestabilityready !== undefined && window.seleniumtestabilityready == true
     """,
+    "inject_if_needed": """
+        if (window.seleniumtestabilityready === true) {
+            window.seleniumtestabilitytoken = arguments[1];
+            return false;
+        }
+        if (arguments[0]) {
+            window.testability_config = arguments[0];
+        }
+        /* BUNDLE */
+        window.seleniumtestabilitytoken = arguments[1];
+        return true;
+    """,
+    "preload": """
+        if (window.seleniumtestabilityready !== true) {
+            var config = /* CONFIG */;
+            if (config) {
+                window.testability_config = config;
+            }
+            /* BUNDLE */
+        }
+    """,
+    "inject": """
+        /* BUNDLE */
+        window.seleniumtestabilitytoken = arguments[0];
+    """,
     "navigator": """
         return navigator[arguments[0]]
     """,
     "dragdrop": """
+        if (window.simulateDragDrop === undefined) {
+            return false;
+        }
         window.simulateDragDrop(arguments[0], arguments[1]);
+        return true;
     """,
     "scroll_to_bottom": """
         window.scrollTo({ left: 0, top: document.body.scrollHeight, behavior: arguments[0]})
@@ -64,6 +133,46 @@ JS_LOOKUP = {
     "storage_keys": """
         return Object.keys(window[arguments[0]])
     """,
+    "storage_getitems": """
+        var storage = window[arguments[0]];
+        var keys = arguments[1] || Object.keys(storage);
+        var items = {};
+        keys.forEach(function(key) {
+            items[key] = storage.getItem(key);
+        });
+        return items;
+    """,
+    "storage_setitems": """
+        var storage = window[arguments[0]];
+        var items = arguments[1];
+        Object.keys(items).forEach(function(key) {
+            storage.setItem(key, items[key]);
+        });
+    """,
+    "storage_snapshot": """
+        var snapshot = {};
+        arguments[0].forEach(function(storageType) {
+            var storage = window[storageType];
+            snapshot[storageType] = {};
+            Object.keys(storage).forEach(function(key) {
+                snapshot[storageType][key] = storage.getItem(key);
+            });
+        });
+        return snapshot;
+    """,
+    "storage_restore": """
+        var snapshot = arguments[0];
+        var clear = arguments[1];
+        Object.keys(snapshot).forEach(function(storageType) {
+            var storage = window[storageType];
+            if (clear) {
+                storage.clear();
+            }
+            Object.keys(snapshot[storageType]).forEach(function(key) {
+                storage.setItem(key, snapshot[storageType][key]);
+            });
+        });
+    """,
     "testability_config": """
         window.testability_config = arguments[0]
     """,
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Tuple
+from .logger import flush_logs
+
+
+class WaitTime(object):
+    """
+    Accumulated time spent waiting for testability.
+    """
+
+    __slots__ = ("seconds", "count")
+
+    def __init__(self: "WaitTime") -> None:
+        self.seconds = 0.0
+        self.count = 0
+
+    def add(self: "WaitTime", seconds: float) -> None:
+        self.seconds += seconds
+        self.count += 1
+
+    def as_dict(self: "WaitTime") -> Dict[str, Any]:
+        return {"seconds": round(self.seconds, 3), "count": self.count}
+
+
+def _by_seconds(waits: Dict[str, WaitTime]) -> List[Tuple[str, WaitTime]]:
+    return sorted(waits.items(), key=lambda item: item[1].seconds, reverse=True)
+
+
+class TestabilityLibraryListener(object):
+    """
+    Robot Framework listener that SeleniumTestability registers alongside SeleniumLibrary's own library listener.
+
+    Besides keyword timings, time spent waiting for testability is attributed to the running suites, the test, the
+    test's top level keyword and the innermost keyword that was running when the wait happened.
+
+    Library listeners get keyword events only from Robot Framework 7 onwards. With older versions, keyword timings are
+    not collected and waits are attributed only to suites and tests.
+    """
+
+    ROBOT_LISTENER_API_VERSION = 3
+
+    def __init__(self: "TestabilityLibraryListener", testability: Any) -> None:
+        self.testability = testability
+        self.keyword_starts: List[Tuple[str, float]] = []
+        self.suite_waits: List[WaitTime] = []
+        self.test: Optional[str] = None
+        self.test_waits: Dict[str, WaitTime] = {}
+        self.step_waits: Dict[str, Dict[str, WaitTime]] = {}
+        self.keyword_waits: Dict[str, WaitTime] = {}
+
+    def record_wait(self: "TestabilityLibraryListener", seconds: float) -> None:
+        """
+        Attributes ``seconds`` spent waiting for testability to whatever is currently running.
+        """
+        for suite in self.suite_waits:
+            suite.add(seconds)
+        if self.keyword_starts:
+            self.keyword_waits.setdefault(self.keyword_starts[-1][0], WaitTime()).add(seconds)
+        if self.test is not None:
+            self.test_waits.setdefault(self.test, WaitTime()).add(seconds)
+            steps = self.step_waits.setdefault(self.test, {})
+            if self.keyword_starts:
+                steps.setdefault(self.keyword_starts[0][0], WaitTime()).add(seconds)
+
+    def wait_report(self: "TestabilityLibraryListener") -> Dict[str, Any]:
+        """
+        Returns accumulated wait times, tests and keywords that have waited the longest first.
+        """
+        return {
+            "tests": [
+                dict(
+                    wait.as_dict(),
+                    name=name,
+                    steps=[dict(step_wait.as_dict(), name=step) for step, step_wait in _by_seconds(self.step_waits[name])],
+                )
+                for name, wait in _by_seconds(self.test_waits)
+            ],
+            "keywords": [dict(wait.as_dict(), name=name) for name, wait in _by_seconds(self.keyword_waits)],
+        }
+
+    def start_suite(self: "TestabilityLibraryListener", data: Any, result: Any) -> None:
+        self.suite_waits.append(WaitTime())
+
+    def start_test(self: "TestabilityLibraryListener", data: Any, result: Any) -> None:
+        self.test = getattr(result, "full_name", None) or result.longname
+
+    def end_test(self: "TestabilityLibraryListener", data: Any, result: Any) -> None:
+        self.test = None
+
+    def start_keyword(self: "TestabilityLibraryListener", data: Any, result: Any) -> None:
+        self.keyword_starts.append((getattr(result, "full_name", None) or result.name, perf_counter()))
+
+    def end_keyword(self: "TestabilityLibraryListener", data: Any, result: Any) -> None:
+        if self.keyword_starts:
+            name, start = self.keyword_starts.pop()
+            self.testability.metrics.observe("keyword." + name, perf_counter() - start)
+
+    def end_suite(self: "TestabilityLibraryListener", data: Any, result: Any) -> None:
+        if self.suite_waits:
+            suite = self.suite_waits.pop()
+            if suite.count and self.testability.wait_report:
+                result.metadata["Testability Wait"] = "{:.3f} seconds in {} waits".format(suite.seconds, suite.count)
+        self.testability.write_metrics()
+        self.testability.write_wait_report()
+        flush_logs()
@@ -3,29 +3,74 @@ from SeleniumLibrary import SeleniumLibrary
 from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.remote.webdriver import WebDriver
 from selenium.webdriver.support.events import AbstractEventListener
-from robot.libraries.BuiltIn import BuiltIn
-from .logger import get_logger, kwargstr, argstr
 import wrapt
-from typing import Callable, Any
-
-
-@wrapt.decorator
-def log_wrapper(wrapped: Callable, instance: "TestabilityListener", args: Any, kwargs: Any) -> None:
-    instance.logger.debug("{}({}) [ENTERING]".format(wrapped.__name__, ", ".join([argstr(args), kwargstr(kwargs)])))
-    wrapped(*args, **kwargs)
-    instance.logger.debug("{}() [LEAVING]".format(wrapped.__name__))
+from functools import wraps
+from robot.libraries.BuiltIn import BuiltIn
+from time import perf_counter
+from .logger import get_logger, log_wrapper
+from typing import Callable, Any, Dict, Tuple
 
 
 def auto_injection(func: Callable) -> Callable:
+    @wraps(func)
     def injection_wrapper(*args: Any, **kwargs: Any) -> Any:
         this = args[0]
         if this.automatic_injection:
-            this.testability.instrument_browser()
+            this.plugin.ensure_instrumented()
         return func(*args, **kwargs)
 
     return injection_wrapper
 
 
+def page_changed(func: Callable) -> Callable:
+    @wraps(func)
+    def page_changed_wrapper(*args: Any, **kwargs: Any) -> Any:
+        this = args[0]
+        this.plugin.invalidate_page(args[-1])
+        return func(*args, **kwargs)
+
+    return page_changed_wrapper
+
+
+@wrapt.decorator
+def measured(wrapped: Callable, instance: Any, args: Tuple, kwargs: Dict) -> Any:
+    """
+    Observes duration of the hook itself and of the selenium command between ``before_`` and ``after_`` hooks.
+    Scripts executed by SeleniumTestability itself are not counted as commands.
+    """
+    metrics = instance.plugin.metrics
+    phase, _, command = wrapped.__name__.partition("_")
+    if command == "execute_script" and instance.plugin.is_own_script(args[0]):
+        command = ""
+    if command and phase == "after":
+        metrics.stop("command." + command)
+    start = perf_counter()
+    try:
+        return wrapped(*args, **kwargs)
+    finally:
+        metrics.observe("TestabilityListener." + wrapped.__name__, perf_counter() - start)
+        if command and phase == "before":
+            metrics.start("command." + command)
+
+
+class SwitchToTracker(object):
+    """
+    Wraps driver's SwitchTo object so that switching windows and frames can be noticed. ``callback`` is called with
+    the name of the switch target.
+    """
+
+    TRACKED = ("window", "frame", "default_content", "parent_frame", "new_window")
+
+    def __init__(self: "SwitchToTracker", switch_to: Any, callback: Callable) -> None:
+        self._switch_to = switch_to
+        self._callback = callback
+
+    def __getattr__(self: "SwitchToTracker", name: str) -> Any:
+        if name in self.TRACKED:
+            self._callback(name)
+        return getattr(self._switch_to, name)
+
+
 class TestabilityListener(AbstractEventListener):
     @property
     def automatic_wait(self: "TestabilityListener") -> bool:
@@ -35,6 +80,10 @@ class TestabilityListener(AbstractEventListener):
     def automatic_injection(self: "TestabilityListener") -> bool:
         return self.testability.testability_settings["automatic_injection"]
 
+    @property
+    def plugin(self: "TestabilityListener") -> Any:
+        return self.testability.testability_settings["testability"]
+
     def __init__(self: "TestabilityListener") -> None:
         AbstractEventListener.__init__(self)
         self.testability = self._get_sl()
@@ -49,83 +98,124 @@ class TestabilityListener(AbstractEventListener):
         return None
 
     @log_wrapper
+    @measured
     def before_navigate_to(self: "TestabilityListener", url: str, driver: WebDriver) -> None:
-        pass
+        if self.automatic_injection and self.plugin.injection_mode == "cdp":
+            self.plugin.register_cdp_injection(driver)
+        if self.plugin.collects_requests:
+            self.plugin.collect_request_stats(driver)
 
     @log_wrapper
+    @measured
+    @page_changed
     @auto_injection
     def after_navigate_to(self: "TestabilityListener", url: str, driver: WebDriver) -> None:
-        pass
+        if self.plugin.log_collector:
+            self.plugin.start_log_collector(driver)
 
     @log_wrapper
+    @measured
     @auto_injection
     def before_click(self: "TestabilityListener", element: WebElement, driver: WebDriver) -> None:
         pass
 
     @log_wrapper
+    @measured
     def after_click(self: "TestabilityListener", element: WebElement, driver: WebDriver) -> None:
-        pass
+        # Without automatic waits, nothing verifies the page token before the next interaction.
+        if not self.automatic_wait:
+            self.plugin.invalidate_page(driver)
 
     @log_wrapper
+    @measured
     @auto_injection
     def before_change_value_of(self: "TestabilityListener", element: WebElement, driver: WebDriver) -> None:
         pass
 
     @log_wrapper
+    @measured
     def after_change_value_of(self: "TestabilityListener", element: WebElement, driver: WebDriver) -> None:
-        pass
+        if not self.automatic_wait:
+            self.plugin.invalidate_page(driver)
 
     @log_wrapper
+    @measured
+    @page_changed
     def after_close(self: "TestabilityListener", driver: WebDriver) -> None:
         pass
 
     @log_wrapper
+    @measured
     def after_execute_script(self: "TestabilityListener", script: str, driver: WebDriver) -> None:
-        pass
+        if not self.plugin.is_own_script(script):
+            self.plugin.invalidate_page(driver)
 
     @log_wrapper
+    @measured
     def after_find(self: "TestabilityListener", by: str, value: str, driver: WebDriver) -> None:
         pass
 
     @log_wrapper
+    @measured
+    @page_changed
     @auto_injection
     def after_navigate_back(self: "TestabilityListener", driver: WebDriver) -> None:
         pass
 
     @log_wrapper
+    @measured
+    @page_changed
     @auto_injection
     def after_navigate_forward(self: "TestabilityListener", driver: WebDriver) -> None:
         pass
 
     @log_wrapper
+    @measured
+    @page_changed
     def after_quit(self: "TestabilityListener", driver: WebDriver) -> None:
         pass
 
     @log_wrapper
+    @measured
     def before_close(self: "TestabilityListener", driver: WebDriver) -> None:
-        pass
+        if self.plugin.collects_requests:
+            self.plugin.collect_request_stats(driver)
 
     @log_wrapper
+    @measured
     def before_execute_script(self: "TestabilityListener", script: str, driver: WebDriver) -> None:
         pass
 
     @log_wrapper
-    @auto_injection
+    @measured
     def before_find(self: "TestabilityListener", by: str, value: str, driver: WebDriver) -> None:
-        if self.automatic_wait:
+        if self.automatic_wait and self.automatic_injection:
+            self.plugin.ensure_instrumented_and_wait()
+        elif self.automatic_wait:
             self.testability.wait_for_testability_ready()
+        elif self.automatic_injection:
+            self.plugin.ensure_instrumented()
 
     @log_wrapper
+    @measured
     def before_navigate_back(self: "TestabilityListener", driver: WebDriver) -> None:
-        pass
+        if self.plugin.collects_requests:
+            self.plugin.collect_request_stats(driver)
 
     @log_wrapper
+    @measured
     def before_navigate_forward(self: "TestabilityListener", driver: WebDriver) -> None:
-        pass
+        if self.plugin.collects_requests:
+            self.plugin.collect_request_stats(driver)
 
     @log_wrapper
+    @measured
     def before_quit(self: "TestabilityListener", driver: WebDriver) -> None:
-        pass
+        if self.plugin.collects_requests:
+            self.plugin.collect_request_stats(driver)
+        self.plugin.stop_log_collector(driver, drain=False)
+        self.plugin.discard_log_store(driver)
+        self.plugin.forget_driver(driver)
 
     @log_wrapper
     def on_exception(self: "TestabilityListener", exception: Exception, driver: WebDriver) -> None:
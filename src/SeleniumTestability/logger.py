@@ -1,9 +1,14 @@
 # -*- coding: utf-8 -*-
+import atexit
 import logging
+import wrapt
+from logging.handlers import QueueHandler, QueueListener
+from os import environ
+from queue import Queue
 from pathlib import Path
-from functools import lru_cache
-from typing import Any
+from typing import Any, Callable, Dict, Optional
 from robot.libraries.BuiltIn import BuiltIn, RobotNotRunningError
+from robot.utils import is_truthy
 
 try:
     location = Path(BuiltIn().get_variable_value("${OUTPUT DIR}"))
@@ -19,15 +24,65 @@ formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(messag
 log_handler.setFormatter(formatter)
 LEVELS = {"FAIL": logging.DEBUG, "WARN": logging.WARN, "INFO": logging.INFO, "DEBUG": logging.DEBUG, "TRACE": logging.DEBUG}
 
+# Entering/leaving messages are only ever written when robot is run with DEBUG or TRACE log level. Otherwise the
+# wrappers are not applied at all. SELENIUMTESTABILITY_LOG_CALLS environment variable overrides this.
+LOG_CALLS = is_truthy(environ.get("SELENIUMTESTABILITY_LOG_CALLS", LEVELS[robot_log_level] <= logging.DEBUG))
+
+
+_loggers: Dict[str, logging.Logger] = {}
+_active_handler: logging.Handler = log_handler
+_queue_listener: Optional[QueueListener] = None
+_log_queue: Optional[Queue] = None
+
+
+class BlockingQueueHandler(QueueHandler):
+    """
+    QueueHandler that waits for free space instead of dropping records when the queue is full.
+    """
+
+    def enqueue(self: "BlockingQueueHandler", record: logging.LogRecord) -> None:
+        self.queue.put(record)  # type: ignore
+
 
-@lru_cache(maxsize=1)
 def get_logger(name: str) -> Any:
-    lgr = logging.getLogger(name)
-    lgr.addHandler(log_handler)
-    set_to = LEVELS[robot_log_level]
-    lgr.setLevel(set_to)
-    lgr.debug(" **** New Session Created for {}  **** ".format(name))
-    return lgr
+    """
+    Returns logger for ``name``. Each logger is configured only once and gets exactly one handler.
+    """
+    if name not in _loggers:
+        lgr = logging.getLogger(name)
+        if _active_handler not in lgr.handlers:
+            lgr.addHandler(_active_handler)
+        lgr.setLevel(LEVELS[robot_log_level])
+        lgr.debug(" **** New Session Created for {}  **** ".format(name))
+        _loggers[name] = lgr
+    return _loggers[name]
+
+
+def use_log_queue(size: int) -> None:
+    """
+    Moves writing of the log file into a background thread. Up to ``size`` records are buffered before logging blocks.
+    """
+    global _active_handler, _queue_listener, _log_queue
+    if _queue_listener is not None:
+        return
+    _log_queue = Queue(size)
+    handler = BlockingQueueHandler(_log_queue)
+    _queue_listener = QueueListener(_log_queue, log_handler)
+    _queue_listener.start()
+    for lgr in _loggers.values():
+        lgr.removeHandler(log_handler)
+        lgr.addHandler(handler)
+    _active_handler = handler
+    atexit.register(flush_logs)
+
+
+def flush_logs() -> None:
+    """
+    Waits until all buffered log records have been written into the log file.
+    """
+    if _log_queue is not None:
+        _log_queue.join()
+    log_handler.flush()
 
 
 def kwargstr(kwargs: Any) -> str:
@@ -36,3 +91,38 @@ def kwargstr(kwargs: Any) -> str:
 
 def argstr(args: Any) -> str:
     return ", ".join("%s" % x for x in args)
+
+
+class CallArgs(object):
+    """
+    Formats call arguments only when the log record is actually emitted.
+    """
+
+    __slots__ = ("args", "kwargs")
+
+    def __init__(self: "CallArgs", args: Any, kwargs: Any) -> None:
+        self.args = args
+        self.kwargs = kwargs
+
+    def __str__(self: "CallArgs") -> str:
+        return ", ".join([argstr(self.args), kwargstr(self.kwargs)])
+
+
+@wrapt.decorator
+def _log_calls(wrapped: Callable, instance: Any, args: Any, kwargs: Any) -> Any:
+    lgr = instance.logger
+    if not lgr.isEnabledFor(logging.DEBUG):
+        return wrapped(*args, **kwargs)
+    lgr.debug("%s(%s) [ENTERING]", wrapped.__name__, CallArgs(args, kwargs))
+    ret = wrapped(*args, **kwargs)
+    lgr.debug("%s() [LEAVING]", wrapped.__name__)
+    return ret
+
+
+def log_wrapper(func: Callable) -> Callable:
+    """
+    Logs entering and leaving of ``func`` into instance's logger when DEBUG level is enabled.
+    """
+    if not LOG_CALLS:
+        return func
+    return _log_calls(func)
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+import json
+import wrapt
+from collections import deque
+from pathlib import Path
+from time import perf_counter, time
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+# Upper bounds of histogram buckets in seconds.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Number of latest wait timeouts kept with the tasks that were pending.
+TIMEOUTS_KEPT = 100
+
+
+class Histogram(object):
+    """
+    Distribution of observed durations in fixed buckets.
+    """
+
+    __slots__ = ("count", "total", "min", "max", "buckets")
+
+    def __init__(self: "Histogram") -> None:
+        self.count = 0
+        self.total = 0.0
+        self.min = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def observe(self: "Histogram", value: float) -> None:
+        if self.count == 0 or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.count += 1
+        self.total += value
+        for idx, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.buckets[idx] += 1
+                return
+        self.buckets[-1] += 1
+
+    def as_dict(self: "Histogram") -> Dict[str, Any]:
+        buckets = {"<={}".format(bound): count for bound, count in zip(BUCKETS, self.buckets)}
+        buckets["+Inf"] = self.buckets[-1]
+        return {
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+            "mean": self.total / self.count if self.count else 0.0,
+            "buckets": buckets,
+        }
+
+
+class Metrics(object):
+    """
+    Counters and duration histograms recorded by SeleniumTestability. Names are dotted, for example
+    ``TestabilityListener.before_find``, ``SeleniumTestability.wait_for_testability_ready``, ``command.click`` or
+    ``keyword.SeleniumLibrary.Click Element``.
+    """
+
+    def __init__(self: "Metrics") -> None:
+        self.counters: Dict[str, int] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        self.timeouts: Deque[Dict[str, Any]] = deque(maxlen=TIMEOUTS_KEPT)
+        self._started: Dict[str, float] = {}
+
+    def increment(self: "Metrics", name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self: "Metrics", name: str, seconds: float) -> None:
+        if name not in self.histograms:
+            self.histograms[name] = Histogram()
+        self.histograms[name].observe(seconds)
+
+    def start(self: "Metrics", name: str) -> None:
+        """
+        Marks start of ``name`` that is observed later with `stop`.
+        """
+        self._started[name] = perf_counter()
+
+    def stop(self: "Metrics", name: str) -> None:
+        started = self._started.pop(name, None)
+        if started is not None:
+            self.observe(name, perf_counter() - started)
+
+    def record_timeout(self: "Metrics", url: Optional[str], pending: Optional[List[Dict[str, Any]]]) -> None:
+        """
+        Keeps the tasks that were ``pending`` on ``url`` when waiting for testability timed out.
+        """
+        self.timeouts.append({"time": time(), "url": url, "pending": pending})
+
+    def snapshot(self: "Metrics", reset: bool = False) -> Dict[str, Any]:
+        ret = {
+            "counters": dict(self.counters),
+            "histograms": {name: histogram.as_dict() for name, histogram in self.histograms.items()},
+            "timeouts": list(self.timeouts),
+        }
+        if reset:
+            self.counters.clear()
+            self.histograms.clear()
+            self.timeouts.clear()
+        return ret
+
+    def dump(self: "Metrics", path: Path) -> None:
+        with path.open("w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2, sort_keys=True)
+
+
+@wrapt.decorator
+def timed(wrapped: Callable, instance: Any, args: Tuple, kwargs: Dict) -> Any:
+    """
+    Observes duration of each call as ``<class name>.<method name>`` into instance's metrics.
+    """
+    start = perf_counter()
+    try:
+        return wrapped(*args, **kwargs)
+    finally:
+        instance.metrics.observe("{}.{}".format(type(instance).__name__, wrapped.__name__), perf_counter() - start)
@@ -2,10 +2,16 @@
 from SeleniumLibrary.base import LibraryComponent, keyword
 from SeleniumLibrary.keywords.element import ElementKeywords
 from SeleniumLibrary import SeleniumLibrary
-from os.path import abspath, dirname, join
-from .listener import TestabilityListener
+from os.path import abspath, dirname, isfile, join
+from .listener import TestabilityListener, SwitchToTracker
 from .javascript import JS_LOOKUP
-from .logger import get_logger, argstr, kwargstr
+from .bundle import get_bundle, CombinedBundle, JavascriptBundle
+from .firefoxextension import EXTENSION_ID, build_extension
+from .firefoxprofile import CachedFirefoxProfile, get_profile
+from .browserlogs import LogTail, LogEntry, LogCollector, LogStore, parse_firefox_log, parse_quotas, filter_entries
+from .logger import get_logger, log_wrapper, use_log_queue
+from .metrics import Metrics, timed
+from .librarylistener import TestabilityLibraryListener
 from .types import (
     WebElementType,
     LocatorType,
@@ -13,31 +19,34 @@ from .types import (
     OptionalStrType,
     BrowserLogsType,
     OptionalDictType,
+    OptionalListType,
     is_firefox,
     StringArray,
     StorageType,
+    StorageItemsType,
+    StorageSnapshotType,
 )
+from robot.libraries.BuiltIn import BuiltIn
 from robot.utils import is_truthy, timestr_to_secs, secs_to_timestr
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.common.exceptions import TimeoutException, WebDriverException, UnknownMethodException, JavascriptException
 from http.cookies import SimpleCookie
 from furl import furl
-from typing import Dict, Callable, Any
+from typing import Dict, Any, Tuple, Set, Iterator, Callable, Iterable, List, Union
 from selenium.webdriver.common.desired_capabilities import DesiredCapabilities
 from selenium.webdriver import FirefoxProfile
-import wrapt
 import re
 import json
-from time import time
 from pathlib import Path
+from tempfile import TemporaryDirectory
+from uuid import uuid4
+from time import perf_counter
 
 
-@wrapt.decorator
-def log_wrapper(wrapped: Callable, instance: "SeleniumTestability", args: Any, kwargs: Any) -> Any:
-    instance.logger.debug("{}({}) [ENTERING]".format(wrapped.__name__, ", ".join([argstr(args), kwargstr(kwargs)])))
-    ret = wrapped(*args, **kwargs)
-    instance.logger.debug("{}() [LEAVING]".format(wrapped.__name__))
-    return ret
+class TestabilityNotInstalled(JavascriptException):
+    """
+    Raised when the current document is not instrumented or is not the document that was instrumented.
+    """
 
 
 class SeleniumTestability(LibraryComponent):
@@ -79,6 +88,89 @@ class SeleniumTestability(LibraryComponent):
     A truthy value. User can choose if he wants to instrument the SUT manually with appropriate keywords (or even, if the SUT is instrumented at build time?) or should SeleniumTestability determinine if SUT has testability features and if not then inject & instrument it automatically.
     Can be enabled/disabled at runtime.
     Defaults to True
+    === injection_mode ===
+    Determines how SUT is instrumented. With ``probe``, SeleniumTestability first checks if the SUT is already instrumented and injects the bundle with separate calls if its not.
+    With ``fused``, check, configuration and injection are done within a single script execution which saves round trips to the browser, especially with remote drivers, but the bundle is sent to the browser on each check.
+    With ``cdp``, the bundle is registered once per browser window with Chrome DevTools Protocol's ``Page.addScriptToEvaluateOnNewDocument`` so that every new document is instrumented before any of its own scripts run and `Instrument Browser` only needs to check that.
+    Windows are registered when they are first instrumented, documents that were loaded before that are injected like with ``probe``. Registration is done again if `Set Testability Config` changes the config. Browsers that do not support DevTools Protocol fall back to ``probe``.
+    Can be set at runtime.
+    Defaults to probe
+
+    Example:
+    | ***** Settings *****
+    | Library   SeleniumLibrary    plugins=SeleniumTestability;True;30 Seconds;True;injection_mode=fused
+    === page_tracking ===
+    A truthy value. When enabled, every instrumented page gets a unique token and SeleniumTestability keeps track of navigation, script executions and window/frame switches, and of clicks and value changes when automatic waiting is disabled.
+    Automatic injection does not check the browser again until one of those happens, which removes most of the installation checks.
+    Waiting verifies the token of the page, so documents loaded without any of those, like `Reload Page` or redirects done by javascript, are instrumented again before waiting.
+    Can be enabled/disabled at runtime.
+    Defaults to True
+    === wait_mode ===
+    Determines how waiting for testability is done. With ``poll``, asyncronous wait script is executed repeatedly within driver's script timeout until testability is ready.
+    With ``event``, driver's script timeout is set to testability timeout and a single asyncronous script waits for the ready callback. SeleniumLibrary's script timeout is restored right after the wait.
+    If driver does not support asyncronous scripts, SeleniumTestability falls back to polling with synchronous scripts.
+    Can be set at runtime.
+    Defaults to poll
+    === idle_check ===
+    A truthy value. When enabled, `Wait For Testability Ready` first checks with a synchronous script if the SUT is already idle and only starts the asyncronous wait if there are pending events.
+    Synchronous scripts are cheaper than asyncronous ones and most of the time there is nothing to wait for.
+    Can be enabled/disabled at runtime.
+    Defaults to True
+    === log_queue_size ===
+    Integer. If larger than 0, SeleniumTestability.log is written from a background thread and up to this many log records are buffered in memory. Buffer is flushed at the end of each suite.
+    Has effect only when set at plugin initialization.
+    Defaults to 0, eg. log is written synchronously.
+    === log_collector ===
+    A truthy value. When enabled, a background thread is started for each browser when it first navigates. The thread drains browser logs every ``log_collector_interval`` into the browser's log store, see `log_store_size`.
+    Collected entries are available via `Get Collected Browser Logs` and `Get Log` with ``stored=True``. Collector can also be controlled with `Start Browser Log Collector` and `Stop Browser Log Collector` keywords.
+    Do note that on Chrome, fetching logs consumes them from the driver, so `Get Log` will not return new entries the collector has already drained.
+    Defaults to False and log_collector_interval to 1 second.
+    === log_store_size ===
+    Integer. Maximum number of browser log entries kept in memory per browser. Entries are added to the store by the log collector, `Get Log` and `Get Log Entries`. With 0, entries are not stored and
+    filters are applied already while Firefox log lines are parsed.
+    When the store is full, the oldest entry of the lowest level is dropped first, so severe entries are retained for as long as possible.
+    ``log_store_quotas`` can further limit how many entries of given level are kept, for example ``DEBUG:100 INFO:1000``. Levels without a quota are only limited by the size of the store.
+    Defaults to 10000 and no quotas.
+
+    Example:
+    | ***** Settings *****
+    | Library   SeleniumLibrary    plugins=SeleniumTestability;log_collector=True;log_store_size=5000;log_store_quotas=DEBUG:0 INFO:1000
+    === metrics_file ===
+    Name of a json file where timing metrics are written at the end of each suite. Relative paths are placed into ${OUTPUT DIR}.
+    Metrics contain counters and duration histograms of listener hooks, instrumentation and waiting, selenium commands and keywords. They are always collected and can also be fetched with `Get Testability Metrics`.
+    Defaults to empty, eg. metrics are not written.
+    === wait_report ===
+    Name of a json file where time spent waiting for testability is reported at the end of each suite. Relative paths are placed into ${OUTPUT DIR}.
+    Wait time is attributed to each test, to the test's top level keywords and to the innermost keyword that was running when the wait happened, tests and keywords that waited the longest listed first.
+    Total wait time of each suite is also added into suite metadata as ``Testability Wait``.
+    Keywords are only known with Robot Framework 7 or newer, with older versions wait time is attributed to suites and tests only.
+    Defaults to empty, eg. report is not written.
+    === request_stats ===
+    A truthy value. Instrumented page keeps statistics of the fetch and XHR requests it has made. When enabled, statistics are collected from the page before it is navigated away or closed so that `Get Testability Request Stats` covers all pages, not just the current one.
+    Can be enabled/disabled at runtime.
+    Defaults to False
+    === blacklist_learning ===
+    Determines if SeleniumTestability learns which requests should be blacklisted. Requests are considered slow when they take longer than ``blacklist_threshold``, either in `request_stats` or while they were pending when waiting timed out.
+    Each request is counted once, even if it was pending during several timeouts. From `request_stats`, all requests of a pattern are counted when even the fastest was slow and otherwise only one if the slowest was.
+    When a request pattern has been slow at least twice, it is learned. With ``suggest``, learned entries are only logged and available via `Get Learned Testability Blacklist`.
+    With ``apply``, learned entries are also added into ``blacklist`` of `Set Testability Config` and take effect when the next page is instrumented. With ``off``, nothing is learned.
+    Can be set at runtime.
+    Defaults to off and blacklist_threshold to 5 seconds.
+
+    Example:
+    | ***** Settings *****
+    | Library   SeleniumLibrary    plugins=SeleniumTestability;blacklist_learning=apply;blacklist_threshold=10 seconds
+
+    === bundle_modules ===
+    Space separated list of javascript modules that are injected into the SUT. ``core`` provides waiting and is always included, ``scroll`` waits for scrolling to stop and ``dragdrop`` provides html5 drag and drop.
+    When ``dragdrop`` is not listed, it is injected only when `Drag And Drop` with ``html5`` is first used on a page. With ``full``, a single bundle containing all the modules is injected.
+    If modular bundles are not available, full bundle is used.
+    Has effect only when set at plugin initialization.
+    Defaults to core scroll
+
+    Example:
+    | ***** Settings *****
+    | Library   SeleniumLibrary    plugins=SeleniumTestability;bundle_modules=core
 
     ==  Waiting ==
 
@@ -98,6 +190,8 @@ class SeleniumTestability(LibraryComponent):
     |   `Wait For Testability Ready`
     In this scenario, test is clicking first element, waits for the fetch call to finish before clicking on the next. Also, do note that in this example, we are calling `Wait For Testability Ready` to also wait for xhr request to finish as there is no other SeleniumLibrary calls after the second click.
 
+    When both automatic waiting and `automatic_injection` are enabled, instrumenting the SUT and waiting for it are done with a single asyncronous script execution per interaction.
+
     === Non Automatic ===
     | ***** Settings *****
     | Library   SeleniumLibrary    plugins=SeleniumTestability;False;30 Seconds;True
@@ -149,6 +243,14 @@ class SeleniumTestability(LibraryComponent):
         "iphone": DesiredCapabilities.IPHONE,
     }
 
+    INJECTION_MODES = ("probe", "fused", "cdp")
+    WAIT_MODES = ("poll", "event")
+    LEARNING_MODES = ("off", "suggest", "apply")
+    BUNDLE_MODULES = ("core", "scroll", "dragdrop")
+    STORAGE_TYPES = ("localStorage", "sessionStorage")
+    # How many times a request pattern has to be slow before it is learned.
+    LEARNING_MIN_OBSERVATIONS = 2
+
     @property
     def automatic_wait(self: "SeleniumTestability") -> bool:
         return self.ctx.testability_settings["automatic_wait"]
@@ -181,6 +283,60 @@ class SeleniumTestability(LibraryComponent):
     def automatic_injection(self: "SeleniumTestability", value: bool) -> None:
         self.ctx.testability_settings["automatic_injection"] = value
 
+    @property
+    def injection_mode(self: "SeleniumTestability") -> str:
+        return self.ctx.testability_settings["injection_mode"]
+
+    @injection_mode.setter
+    def injection_mode(self: "SeleniumTestability", value: str) -> None:
+        mode = value.lower()
+        if mode not in self.INJECTION_MODES:
+            raise ValueError("Unknown injection_mode: {}, valid options: {}".format(value, ", ".join(self.INJECTION_MODES)))
+        self.ctx.testability_settings["injection_mode"] = mode
+
+    @property
+    def page_tracking(self: "SeleniumTestability") -> bool:
+        return self.ctx.testability_settings["page_tracking"]
+
+    @page_tracking.setter
+    def page_tracking(self: "SeleniumTestability", value: bool) -> None:
+        self.ctx.testability_settings["page_tracking"] = value
+        self.page_tokens.clear()
+
+    @property
+    def wait_mode(self: "SeleniumTestability") -> str:
+        return self.ctx.testability_settings["wait_mode"]
+
+    @wait_mode.setter
+    def wait_mode(self: "SeleniumTestability", value: str) -> None:
+        mode = value.lower()
+        if mode not in self.WAIT_MODES:
+            raise ValueError("Unknown wait_mode: {}, valid options: {}".format(value, ", ".join(self.WAIT_MODES)))
+        self.ctx.testability_settings["wait_mode"] = mode
+
+    @property
+    def idle_check(self: "SeleniumTestability") -> bool:
+        return self.ctx.testability_settings["idle_check"]
+
+    @idle_check.setter
+    def idle_check(self: "SeleniumTestability", value: bool) -> None:
+        self.ctx.testability_settings["idle_check"] = value
+
+    @property
+    def blacklist_learning(self: "SeleniumTestability") -> str:
+        return self.ctx.testability_settings["blacklist_learning"]
+
+    @blacklist_learning.setter
+    def blacklist_learning(self: "SeleniumTestability", value: str) -> None:
+        mode = value.lower()
+        if mode not in self.LEARNING_MODES:
+            raise ValueError("Unknown blacklist_learning: {}, valid options: {}".format(value, ", ".join(self.LEARNING_MODES)))
+        self.ctx.testability_settings["blacklist_learning"] = mode
+
+    @property
+    def collects_requests(self: "SeleniumTestability") -> bool:
+        return self.request_stats or self.blacklist_learning != "off"
+
     def __init__(
         self: "SeleniumTestability",
         ctx: SeleniumLibrary,
@@ -188,37 +344,246 @@ class SeleniumTestability(LibraryComponent):
         timeout: str = "30 seconds",
         error_on_timeout: bool = True,
         automatic_injection: bool = True,
+        injection_mode: str = "probe",
+        page_tracking: bool = True,
+        wait_mode: str = "poll",
+        idle_check: bool = True,
+        log_queue_size: int = 0,
+        log_collector: bool = False,
+        log_collector_interval: str = "1 second",
+        log_store_size: int = 10000,
+        log_store_quotas: str = "",
+        metrics_file: str = "",
+        wait_report: str = "",
+        request_stats: bool = False,
+        blacklist_learning: str = "off",
+        blacklist_threshold: str = "5 seconds",
+        bundle_modules: str = "core scroll",
     ) -> None:
         LibraryComponent.__init__(self, ctx)
+        if int(log_queue_size) > 0:
+            use_log_queue(int(log_queue_size))
         self.logger = get_logger("SeleniumTestability")
-        self.logger.debug("__init__({},{},{},{},{})".format(ctx, automatic_wait, timeout, error_on_timeout, automatic_injection))
+        self.logger.debug(
+            "__init__({},{},{},{},{},{},{},{},{},{},{},{},{},{},{},{},{},{},{},{})".format(
+                ctx,
+                automatic_wait,
+                timeout,
+                error_on_timeout,
+                automatic_injection,
+                injection_mode,
+                page_tracking,
+                wait_mode,
+                idle_check,
+                log_queue_size,
+                log_collector,
+                log_collector_interval,
+                log_store_size,
+                log_store_quotas,
+                metrics_file,
+                wait_report,
+                request_stats,
+                blacklist_learning,
+                blacklist_threshold,
+                bundle_modules,
+            )
+        )
         self.el = ElementKeywords(ctx)
         self.CWD = abspath(dirname(__file__))
-        self.js_bundle = join(self.CWD, "js", "testability.js")
+        self.js_bundle = self._load_bundle(bundle_modules)
+        dragdrop = self._js_path("dragdrop")
+        self.dragdrop_bundle = get_bundle(dragdrop) if isfile(dragdrop) else None
         self.ctx.event_firing_webdriver = TestabilityListener
+        self.library_listener = TestabilityLibraryListener(self)
+        listeners = self.ctx.ROBOT_LIBRARY_LISTENER
+        if not isinstance(listeners, list):
+            listeners = [listeners] if listeners is not None else []
+        self.ctx.ROBOT_LIBRARY_LISTENER = listeners + [self.library_listener]
         self.ctx.testability_settings = {"testability": self}
+        self.page_tokens = {}  # type: Dict[int, str]
+        self.own_scripts = set(JS_LOOKUP.values())
+        self.sync_only_drivers: Set[int] = set()
+        self.window_handles: Dict[int, str] = {}
+        self.cdp_scripts: Dict[Tuple[int, str], Tuple[str, str]] = {}
+        self.cdp_unsupported: Set[int] = set()
         self.automatic_wait = is_truthy(automatic_wait)
         self.automatic_injection = is_truthy(automatic_injection)
+        self.injection_mode = injection_mode
+        self.page_tracking = is_truthy(page_tracking)
+        self.wait_mode = wait_mode
+        self.idle_check = is_truthy(idle_check)
         self.error_on_timeout = is_truthy(error_on_timeout)
         self.timeout = timeout  # type: ignore
         self.hidden_elements = {}  # type: Dict[str, str]
         self.browser_warn_shown = False
         self.empty_log_warn_shown = False
-        self.ff_log_pos = {}  # type: Dict[str, int]
+        self.ff_logs = {}  # type: Dict[str, LogTail]
+        self.log_collector = is_truthy(log_collector)
+        self.log_collector_interval = timestr_to_secs(log_collector_interval)
+        self.log_store_size = int(log_store_size)
+        self.log_store_quotas = parse_quotas(log_store_quotas)
+        self.log_stores = {}  # type: Dict[int, LogStore]
+        self.log_collectors = {}  # type: Dict[int, LogCollector]
+        self.metrics = Metrics()
+        self.metrics_file = metrics_file
+        self.wait_report = wait_report
+        self.request_stats = is_truthy(request_stats)
+        self.requests = {}  # type: Dict[Tuple[str, str], Dict]
+        self.blacklist_learning = blacklist_learning
+        self.blacklist_threshold = timestr_to_secs(blacklist_threshold)
+        self.slow_requests = {}  # type: Dict[Tuple[str, str], int]
+        self.learned_blacklist = []  # type: List[Dict[str, str]]
         self.testability_config = None  # type: OptionalDictType
 
     @log_wrapper
-    def _inject_testability(self: "SeleniumTestability") -> None:
+    def _inject_testability(self: "SeleniumTestability", token: str) -> None:
         """
         Injects SeleniumTestability javascript bindings into a current browser's current window. This should happen automatically vie SeleniumTestability's internal `Event Firing Webdriver` support but keyword is provided also.
         """
 
-        if self.testability_config:
-            self.ctx.driver.execute_script(JS_LOOKUP["testability_config"], self.testability_config)
+        config = self._effective_config()
+        if config:
+            self.ctx.driver.execute_script(JS_LOOKUP["testability_config"], config)
 
-        with open(self.js_bundle, "r") as f:
-            buf = f.read()
-            self.ctx.driver.execute_script("{};".format(buf))
+        self.ctx.driver.execute_script(self._bundle_script("inject"), token)
+
+    @log_wrapper
+    def _inject_if_needed(self: "SeleniumTestability", token: str) -> bool:
+        """
+        Checks, configures and injects testability with one script execution. Returns True if SUT was instrumented.
+        """
+        return self.ctx.driver.execute_script(self._bundle_script("inject_if_needed"), self._effective_config(), token)
+
+    @staticmethod
+    def _driver_key(driver: Any) -> int:
+        return id(getattr(driver, "wrapped_driver", driver))
+
+    def invalidate_page(self: "SeleniumTestability", driver: Any = None) -> None:
+        """
+        Forgets that the current document of ``driver`` has been instrumented.
+        """
+        if self.page_tokens:
+            self.page_tokens.pop(self._driver_key(driver or self.ctx.driver), None)
+
+    def _track_window_switches(self: "SeleniumTestability", driver: Any = None) -> None:
+        driver = driver or self.ctx.driver
+        raw_driver = getattr(driver, "wrapped_driver", driver)
+        switch_to = getattr(raw_driver, "_switch_to", None)
+        if switch_to is not None and not isinstance(switch_to, SwitchToTracker):
+            raw_driver._switch_to = SwitchToTracker(switch_to, lambda target: self._switched(raw_driver, target))
+
+    def _switched(self: "SeleniumTestability", driver: Any, target: str) -> None:
+        self.invalidate_page(driver)
+        if target in ("window", "new_window"):
+            self.window_handles.pop(self._driver_key(driver), None)
+
+    def _window_key(self: "SeleniumTestability", driver: Any) -> Tuple[int, str]:
+        """
+        Returns key of the current window of ``driver``. The handle is asked from the browser only after switching windows.
+        """
+        key = self._driver_key(driver)
+        if key not in self.window_handles:
+            self.window_handles[key] = getattr(driver, "wrapped_driver", driver).current_window_handle
+        return key, self.window_handles[key]
+
+    def ensure_instrumented(self: "SeleniumTestability") -> bool:
+        """
+        Instruments the current document unless page tracking knows that it already is. Returns True if SUT was instrumented.
+        """
+        if self.page_tracking and self._driver_key(self.ctx.driver) in self.page_tokens:
+            return False
+        return self.instrument_browser()
+
+    def _js_path(self: "SeleniumTestability", name: str) -> str:
+        return join(self.CWD, "js", "{}.js".format(name))
+
+    def _load_bundle(self: "SeleniumTestability", bundle_modules: str) -> Union[JavascriptBundle, CombinedBundle]:
+        modules = bundle_modules.lower().split()
+        if modules == ["full"]:
+            return get_bundle(self._js_path("testability"))
+        for module in modules:
+            if module not in self.BUNDLE_MODULES:
+                raise ValueError(
+                    "Unknown bundle module: {}, valid options: full, {}".format(module, ", ".join(self.BUNDLE_MODULES))
+                )
+        modules = ["core"] + [module for module in self.BUNDLE_MODULES if module != "core" and module in modules]
+        paths = [self._js_path(module) for module in modules]
+        if not all(isfile(path) for path in paths):
+            self.logger.info("Modular javascript bundles are not available, using full bundle")
+            return get_bundle(self._js_path("testability"))
+        return CombinedBundle([get_bundle(path) for path in paths])
+
+    def cdp_registered(self: "SeleniumTestability", driver: Any = None) -> bool:
+        """
+        Returns True if the bundle with the current config is registered to be evaluated on every new document in the
+        current window of ``driver``.
+        """
+        if not self.cdp_scripts:
+            return False
+        registered = self.cdp_scripts.get(self._window_key(driver or self.ctx.driver))
+        return registered is not None and registered[1] == json.dumps(self._effective_config())
+
+    def register_cdp_injection(self: "SeleniumTestability", driver: Any = None) -> None:
+        """
+        Registers the bundle to be evaluated on every new document in the current window of ``driver`` unless it already
+        is. Registrations only apply to the window they were made in, so each window is registered separately. Documents
+        that are already loaded are not affected.
+        """
+        driver = driver or self.ctx.driver
+        if self._driver_key(driver) in self.cdp_unsupported:
+            return
+        raw_driver = getattr(driver, "wrapped_driver", driver)
+        try:
+            if self.cdp_registered(driver):
+                return
+            self._track_window_switches(driver)
+            key = self._window_key(driver)
+            config = json.dumps(self._effective_config())
+            if key in self.cdp_scripts:
+                raw_driver.execute_cdp_cmd("Page.removeScriptToEvaluateOnNewDocument", {"identifier": self.cdp_scripts[key][0]})
+            result = raw_driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": self._preload_source(config)})
+        except (AttributeError, WebDriverException) as e:
+            self.logger.warning("Browser does not support DevTools Protocol, falling back to probe injection: {}".format(e))
+            self.cdp_unsupported.add(self._driver_key(driver))
+            return
+        self.cdp_scripts[key] = (result["identifier"], config)
+
+    def _preload_source(self: "SeleniumTestability", config: str) -> str:
+        """
+        Returns a script that instruments a new document with json encoded ``config`` before any of its own scripts run.
+        """
+        return self.js_bundle.render(JS_LOOKUP["preload"]).replace("/* CONFIG */", config, 1)
+
+    def forget_driver(self: "SeleniumTestability", driver: Any) -> None:
+        """
+        Forgets DevTools registrations and other state kept for ``driver`` when it quits, so that
+        a new driver that happens to get the same key does not inherit them.
+        """
+        key = self._driver_key(driver)
+        for window_key in [window_key for window_key in self.cdp_scripts if window_key[0] == key]:
+            del self.cdp_scripts[window_key]
+        self.window_handles.pop(key, None)
+        self.cdp_unsupported.discard(key)
+        self.sync_only_drivers.discard(key)
+
+    def _inject_dragdrop(self: "SeleniumTestability") -> None:
+        """
+        Injects drag and drop helper into the current document. Without modular bundles, the SUT is instrumented instead.
+        """
+        if self.dragdrop_bundle is None:
+            self.instrument_browser()
+            return
+        script = self.dragdrop_bundle.script
+        self.own_scripts.add(script)
+        self.ctx.driver.execute_script(script)
+
+    def _bundle_script(self: "SeleniumTestability", name: str) -> str:
+        script = self.js_bundle.render(JS_LOOKUP[name])
+        self.own_scripts.add(script)
+        return script
+
+    def is_own_script(self: "SeleniumTestability", script: str) -> bool:
+        return script in self.own_scripts
 
     @log_wrapper
     @keyword
@@ -246,13 +611,63 @@ class SeleniumTestability(LibraryComponent):
         self.testability_config = config
 
     @log_wrapper
+    @timed
     @keyword
-    def instrument_browser(self: "SeleniumTestability") -> None:
+    def instrument_browser(self: "SeleniumTestability") -> bool:
         """
         Instruments the current webpage for testability. This should happen automatically vie SeleniumTestability's internal `Event Firing Webdriver` support but keyword is provided also. Calls `Inject Testability` keyword automatically.
+
+        Returns True if the page was instrumented by this call, False if it was already instrumented.
         """
-        if not self.is_testability_installed():
-            self._inject_testability()
+        token = uuid4().hex
+        if self.injection_mode == "cdp":
+            self.register_cdp_injection()
+        if self.injection_mode == "fused":
+            injected = self._inject_if_needed(token)
+        else:
+            # Documents that were not preloaded, like windows opened by the SUT before registration, are injected.
+            injected = not self.is_testability_installed()
+            if injected:
+                self._inject_testability(token)
+        if self.page_tracking:
+            self._track_window_switches()
+            self.page_tokens[self._driver_key(self.ctx.driver)] = token if injected or self.injection_mode == "fused" else ""
+        if injected:
+            self.metrics.increment("SeleniumTestability.injected")
+        return injected
+
+    @log_wrapper
+    @keyword
+    def set_testability_page_tracking(self: "SeleniumTestability", enabled: bool) -> None:
+        """
+        Sets the state of page tracking. See `page_tracking` for details.
+        Parameters:
+         - ``enabled`` state of page tracking
+        """
+        self.page_tracking = is_truthy(enabled)
+
+    @log_wrapper
+    @keyword
+    def set_testability_injection_mode(self: "SeleniumTestability", mode: str) -> str:
+        """
+        Sets how SeleniumTestability instruments the SUT. See `injection_mode` for valid options. Returns the previous mode.
+        Parameters:
+         - ``mode`` name of the injection mode
+        """
+        current = self.injection_mode
+        self.injection_mode = mode
+        return current
+
+    @log_wrapper
+    @keyword
+    def get_testability_bundle_info(self: "SeleniumTestability") -> dict:
+        """
+        Returns a dictionary with ``hits``, ``misses``, ``mtime`` and ``digest`` of the in-memory cache that holds the injected javascript bundle.
+
+        Bundle is read from the disk only once per process unless ``SELENIUMTESTABILITY_JS_AUTO_RELOAD`` environment variable
+        is set to true, in which case it is read again whenever its modification time changes.
+        """
+        return self.js_bundle.info()._asdict()
 
     @log_wrapper
     @keyword
@@ -297,6 +712,7 @@ class SeleniumTestability(LibraryComponent):
         self.set_testability_automatic_wait(False)
 
     @log_wrapper
+    @timed
     @keyword
     def wait_for_testability_ready(
         self: "SeleniumTestability", timeout: OptionalStrType = None, error_on_timeout: OptionalBoolType = None
@@ -308,7 +724,40 @@ class SeleniumTestability(LibraryComponent):
         - ``error_on_timeout`` if timeout occurs, should we throw an error
 
         Both parameters are optional, if not provided, default values from plugin initialization time are used.
+
+        If a new document has been loaded without SeleniumTestability noticing it, for example after `Reload Page` or
+        a redirect done by javascript, the document is instrumented again before waiting when automatic injection is enabled.
         """
+        for attempt in range(2):
+            try:
+                token = self._page_token()
+                script = JS_LOOKUP["wait_for_testability"]
+                self._wait_for_ready(timeout, error_on_timeout, script, token, idle_check=self.idle_check, token=token)
+                return
+            except TestabilityNotInstalled as e:
+                if attempt or not self.automatic_injection:
+                    self.warn(e)
+                    return
+                self.metrics.increment("SeleniumTestability.reinstrumented")
+                self.instrument_browser()
+
+    def _page_token(self: "SeleniumTestability") -> OptionalStrType:
+        """
+        Returns the token of the document page tracking knows to be instrumented, None if it is not known.
+        """
+        if not self.page_tracking:
+            return None
+        return self.page_tokens.get(self._driver_key(self.ctx.driver)) or None
+
+    def _wait_for_ready(
+        self: "SeleniumTestability",
+        timeout: OptionalStrType,
+        error_on_timeout: OptionalBoolType,
+        script: str,
+        *args: Any,
+        idle_check: bool = False,
+        token: OptionalStrType = None
+    ) -> Any:
         local_timeout = self.timeout
         if timeout is not None:
             local_timeout = timestr_to_secs(timeout)
@@ -316,15 +765,340 @@ class SeleniumTestability(LibraryComponent):
         if error_on_timeout is not None:
             local_error_on_timeout = is_truthy(error_on_timeout)
 
+        key = self._driver_key(self.ctx.driver)
+        start = perf_counter()
         try:
-            WebDriverWait(self.ctx.driver, local_timeout, 0.15, ignored_exceptions=[TimeoutException]).until(
-                lambda x: self.ctx.driver.execute_async_script(JS_LOOKUP["wait_for_testability"])
+            if idle_check and self._testability_idle(token):
+                self.metrics.increment("SeleniumTestability.idle")
+                return True
+            if self.wait_mode == "event" and key not in self.sync_only_drivers:
+                try:
+                    self.ctx.driver.set_script_timeout(local_timeout)
+                    try:
+                        return self._ready_result(self.ctx.driver.execute_async_script(script, *args))
+                    finally:
+                        self.ctx.driver.set_script_timeout(self.ctx.timeout)
+                except UnknownMethodException:
+                    self.logger.warning("Driver does not support asyncronous scripts, falling back to polling")
+                    self.sync_only_drivers.add(key)
+            if key in self.sync_only_drivers:
+                return WebDriverWait(self.ctx.driver, local_timeout, 0.15, ignored_exceptions=[TimeoutException]).until(
+                    lambda x: self._testability_idle(token)
+                )
+            return WebDriverWait(self.ctx.driver, local_timeout, 0.15, ignored_exceptions=[TimeoutException]).until(
+                lambda x: self._ready_result(self.ctx.driver.execute_async_script(script, *args))
             )
         except TimeoutException:
+            self.metrics.increment("SeleniumTestability.timeouts")
+            message = "Timed out waiting for testability ready callback to trigger."
+            pending = self._pending_tasks()
+            if pending:
+                message = "{} Pending tasks: {}".format(message, "; ".join(self._describe_task(task) for task in pending))
+            elif pending is not None:
+                message += " No tracked tasks are pending, SUT might be waiting for tasks it has added to testability itself."
+            self.logger.warning(message)
             if local_error_on_timeout:
-                raise TimeoutException("Timed out waiting for testability ready callback to trigger.")
+                raise TimeoutException(message)
+        except TestabilityNotInstalled:
+            self.invalidate_page()
+            raise
         except Exception as e:
+            self.invalidate_page()
             self.warn(e)
+        finally:
+            self.library_listener.record_wait(perf_counter() - start)
+        return None
+
+    def _pending_tasks(self: "SeleniumTestability") -> OptionalListType:
+        """
+        Returns tasks the SUT is waiting for and records them into metrics. Returns None if they can not be determined.
+        """
+        url = None
+        pending = None
+        slow_after = self.blacklist_threshold * 1000 if self.blacklist_learning != "off" else None
+        try:
+            url = self.ctx.driver.current_url
+            pending = self.ctx.driver.execute_script(JS_LOOKUP["pending_tasks"], slow_after)
+        except WebDriverException as e:
+            self.logger.debug("Unable to get pending tasks: {}".format(e))
+        self.metrics.record_timeout(url, pending)
+        for task in pending or []:
+            if task.pop("slow", False):
+                self._observe_slow_request(task["method"], task["pattern"])
+        return pending
+
+    @staticmethod
+    def _describe_task(task: Dict) -> str:
+        kind = task.get("type")
+        age = "{:.1f}s".format(task.get("age", 0) / 1000.0)
+        if kind in ("fetch", "xhr"):
+            return "{} {} {} ({})".format(kind, task.get("method"), task.get("url"), age)
+        if kind == "timeout":
+            return "timeout of {}ms ({})".format(task.get("delay"), age)
+        if kind in ("animation", "transition"):
+            return "{} {} on {} ({})".format(kind, task.get("name"), task.get("target"), age)
+        if kind == "scroll":
+            return "scroll at {},{} ({})".format(task.get("x"), task.get("y"), age)
+        return "{} ({})".format(kind, age)
+
+    def _testability_idle(self: "SeleniumTestability", token: OptionalStrType = None) -> bool:
+        return self._ready_result(self.ctx.driver.execute_script(JS_LOOKUP["testability_idle"], token))
+
+    @staticmethod
+    def _ready_result(result: Any) -> Any:
+        if result is None:
+            raise TestabilityNotInstalled("Testability is not installed in the current page")
+        return result
+
+    @timed
+    def ensure_instrumented_and_wait(self: "SeleniumTestability") -> None:
+        """
+        Instruments the current document if needed and waits until testability is ready.
+
+        Waiting is done with the token checked wait script which does not carry the bundle, and the document is only
+        instrumented if that reports it is not. With ``fused`` injection mode, documents page tracking does not know
+        are instrumented and waited for with a single script execution instead.
+        """
+        key = self._driver_key(self.ctx.driver)
+        if self.injection_mode == "cdp":
+            self.register_cdp_injection()
+        tracked = self.page_tracking and key in self.page_tokens
+        if self.injection_mode != "fused" or tracked or key in self.sync_only_drivers:
+            self.wait_for_testability_ready()
+            return
+        token = uuid4().hex
+        try:
+            result = self._wait_for_ready(None, None, self._bundle_script("instrument_and_wait"), self._effective_config(), token)
+        except TestabilityNotInstalled:
+            self.ensure_instrumented()
+            self.wait_for_testability_ready()
+            return
+        if self.page_tracking and result is not None:
+            self.page_tokens[self._driver_key(self.ctx.driver)] = result if isinstance(result, str) else ""
+
+    @log_wrapper
+    @keyword
+    def get_testability_metrics(self: "SeleniumTestability", reset: bool = False) -> dict:
+        """
+        Returns timing metrics collected so far as a dictionary with ``counters`` and ``histograms`` keys.
+        Each histogram has ``count``, ``total``, ``min``, ``max`` and ``mean`` in seconds and ``buckets`` with number of observations per upper bound.
+        See `metrics_file` for details.
+
+        Parameters:
+        - ``reset`` if truthy, metrics are cleared after they are returned
+
+        Example:
+        | ${metrics}=  | `Get Testability Metrics` |                                                                  |
+        | Log          | ${metrics}[histograms][SeleniumTestability.wait_for_testability_ready][mean] |                   |
+        """
+        return self.metrics.snapshot(is_truthy(reset))
+
+    def write_metrics(self: "SeleniumTestability") -> None:
+        """
+        Writes metrics into `metrics_file` if it is set.
+        """
+        if self.metrics_file:
+            self.metrics.dump(self._output_path(self.metrics_file))
+
+    def write_wait_report(self: "SeleniumTestability") -> None:
+        """
+        Writes wait times collected by the library listener into `wait_report` if it is set.
+        """
+        if self.wait_report:
+            with self._output_path(self.wait_report).open("w", encoding="utf-8") as f:
+                json.dump(self.library_listener.wait_report(), f, indent=2)
+
+    @log_wrapper
+    @keyword
+    def get_pending_testability_tasks(self: "SeleniumTestability") -> OptionalListType:
+        """
+        Returns a list of asyncronous tasks the SUT is currently waiting for, or None if the SUT is not instrumented.
+        Same information is included in the error message and metrics when `Wait For Testability Ready` times out.
+
+        Tasks are tracked by wrapping fetch, XMLHttpRequest and setTimeout once more on top of testability's own bindings, so
+        each of those calls costs one extra function call. Timeouts longer than ``maxTimeout`` and requests matching the
+        ``blacklist`` of `Set Testability Config` are not returned as testability does not wait for them. Waits the SUT
+        adds to testability directly are not tracked.
+
+        Each task is a dictionary with ``type``, ``started`` and ``age`` in milliseconds and type specific fields:
+        - ``fetch`` and ``xhr`` have ``url`` and ``method``
+        - ``timeout`` has ``delay``
+        - ``animation`` and ``transition`` have ``name`` and ``target``
+        - ``scroll`` has ``x`` and ``y``
+
+        Example:
+        | ${tasks}=  | `Get Pending Testability Tasks` |
+        """
+        return self.ctx.driver.execute_script(JS_LOOKUP["pending_tasks"])
+
+    def collect_request_stats(self: "SeleniumTestability", driver: Any = None) -> None:
+        """
+        Moves request statistics from the current page of ``driver`` into SeleniumTestability.
+        """
+        try:
+            stats = (driver or self.ctx.driver).execute_script(JS_LOOKUP["request_stats"], True)
+        except WebDriverException as e:
+            self.logger.debug("Unable to collect request stats: {}".format(e))
+            return
+        for page_stats in stats or []:
+            key = (page_stats["method"], page_stats["pattern"])
+            slow = self._slow_request_count(page_stats) - page_stats.pop("reported", 0)
+            if self.blacklist_learning != "off" and slow > 0:
+                self._observe_slow_request(page_stats["method"], page_stats["pattern"], slow)
+            if key not in self.requests:
+                self.requests[key] = page_stats
+                continue
+            current = self.requests[key]
+            current["min"] = min(current["min"], page_stats["min"])
+            current["max"] = max(current["max"], page_stats["max"])
+            for field in ("count", "failed", "total"):
+                current[field] += page_stats[field]
+
+    def _slow_request_count(self: "SeleniumTestability", stats: Dict) -> int:
+        """
+        Returns how many of the requests in ``stats`` are known to have taken longer than ``blacklist_threshold``.
+        """
+        threshold = self.blacklist_threshold * 1000
+        if stats["min"] >= threshold:
+            return stats["count"]
+        return 1 if stats["max"] >= threshold else 0
+
+    @log_wrapper
+    @keyword
+    def get_testability_request_stats(self: "SeleniumTestability", reset: bool = False) -> List[Dict]:
+        """
+        Returns statistics of fetch and XHR requests made by instrumented pages since the last reset, the slowest first.
+        Urls are grouped into patterns where query string is dropped and numeric or hash like path segments are replaced with ``:id``.
+
+        Each item is a dictionary with ``method``, ``pattern``, ``count``, ``failed`` and ``total``, ``min``, ``max`` and ``mean`` durations in milliseconds.
+        Patterns that routinely take long are good candidates for ``blacklist`` in `Set Testability Config`. See also `request_stats`.
+
+        Parameters:
+        - ``reset`` if truthy, statistics are cleared after they are returned
+
+        Example:
+        | ${stats}=  | `Get Testability Request Stats` |                   |
+        | Log        | ${stats}[0][pattern] took ${stats}[0][mean]ms on average |
+        """
+        self.collect_request_stats()
+        stats = sorted(self.requests.values(), key=lambda item: item["total"], reverse=True)
+        ret = [dict(item, mean=item["total"] / item["count"]) for item in stats]
+        if is_truthy(reset):
+            self.requests.clear()
+        return ret
+
+    def _effective_config(self: "SeleniumTestability") -> OptionalDictType:
+        """
+        Returns testability config with learned blacklist entries added when they are applied.
+        """
+        if self.blacklist_learning != "apply" or not self.learned_blacklist:
+            return self.testability_config
+        config = dict(self.testability_config or {})
+        blacklist = list(config.get("blacklist", []))
+        config["blacklist"] = blacklist + [entry for entry in self.learned_blacklist if entry not in blacklist]
+        return config
+
+    @staticmethod
+    def _pattern_regex(pattern: str) -> str:
+        regex = re.escape(pattern).replace(":id", "[^/]+")
+        if pattern.startswith("/"):
+            regex = "(https?://[^/]+)?" + regex
+        return "^{}([?#].*)?$".format(regex)
+
+    def _observe_slow_request(self: "SeleniumTestability", method: str, pattern: str, count: int = 1) -> None:
+        key = (method, pattern)
+        self.slow_requests[key] = self.slow_requests.get(key, 0) + count
+        if self.slow_requests[key] < self.LEARNING_MIN_OBSERVATIONS:
+            return
+        entry = {"url": self._pattern_regex(pattern), "method": method}
+        if entry not in self.learned_blacklist:
+            self.learned_blacklist.append(entry)
+            message = "Learned slow request {} {}, blacklist entry: {}".format(method, pattern, entry)
+            self.logger.info(message)
+            self.info(message)
+
+    @log_wrapper
+    @keyword
+    def set_testability_blacklist_learning(
+        self: "SeleniumTestability", mode: str, threshold: OptionalStrType = None
+    ) -> str:
+        """
+        Sets how SeleniumTestability learns slow requests. See `blacklist_learning` for valid options. Returns the previous mode.
+        Parameters:
+         - ``mode`` name of the learning mode
+         - ``threshold`` if set, requests taking longer than this are considered slow. Robot framework timestring
+        """
+        current = self.blacklist_learning
+        self.blacklist_learning = mode
+        if threshold is not None:
+            self.blacklist_threshold = timestr_to_secs(threshold)
+        return current
+
+    @log_wrapper
+    @keyword
+    def get_learned_testability_blacklist(self: "SeleniumTestability") -> List[Dict[str, str]]:
+        """
+        Returns blacklist entries learned so far as a list of dictionaries with ``url`` and ``method`` keys. Returned
+        value can be used as ``blacklist`` in `Set Testability Config`. See `blacklist_learning` for details.
+
+        Example:
+        | ${blacklist}=           | `Get Learned Testability Blacklist` |                         |
+        | ${tc}=                  | `Create Dictionary`                 | blacklist=${blacklist}  |
+        | Set Testability Config  | ${tc}                               |                         |
+        """
+        return [dict(entry) for entry in self.learned_blacklist]
+
+    @log_wrapper
+    @keyword
+    def write_learned_testability_blacklist(self: "SeleniumTestability", filename: str = "learned_blacklist.json") -> int:
+        """
+        Writes blacklist entries learned so far into ``filename`` as json. Relative ``filename`` is placed into ${OUTPUT DIR}.
+        Returns the number of entries written.
+        """
+        with self._output_path(filename).open("w", encoding="utf-8") as f:
+            json.dump(self.learned_blacklist, f, indent=2)
+        return len(self.learned_blacklist)
+
+    @log_wrapper
+    @keyword
+    def set_testability_request_stats(self: "SeleniumTestability", enabled: bool) -> None:
+        """
+        Sets whether request statistics are collected from pages before they are navigated away. See `request_stats` for details.
+        Parameters:
+         - ``enabled`` state of request statistics collection
+        """
+        self.request_stats = is_truthy(enabled)
+
+    @log_wrapper
+    @keyword
+    def is_testability_ready(self: "SeleniumTestability") -> bool:
+        """
+        Returns True if there are no pending asyncronous events in the SUT, False if there are or if the SUT is not instrumented.
+        This does not wait.
+        """
+        return self.ctx.driver.execute_script(JS_LOOKUP["testability_idle"]) is True
+
+    @log_wrapper
+    @keyword
+    def set_testability_idle_check(self: "SeleniumTestability", enabled: bool) -> None:
+        """
+        Sets the state of synchronous idle check that is done before waiting. See `idle_check` for details.
+        Parameters:
+         - ``enabled`` state of the idle check
+        """
+        self.idle_check = is_truthy(enabled)
+
+    @log_wrapper
+    @keyword
+    def set_testability_wait_mode(self: "SeleniumTestability", mode: str) -> str:
+        """
+        Sets how SeleniumTestability waits for testability to be ready. See `wait_mode` for valid options. Returns the previous mode.
+        Parameters:
+         - ``mode`` name of the wait mode
+        """
+        current = self.wait_mode
+        self.wait_mode = mode
+        return current
 
     @log_wrapper
     @keyword
@@ -539,7 +1313,9 @@ class SeleniumTestability(LibraryComponent):
                     raise RuntimeError(f"Unable to upload {filename} - its missing")
             else:
                 from_element = self.el.find_element(locator)
-                self.ctx.driver.execute_script(JS_LOOKUP["dragdrop"], from_element, to_element)
+                if not self.ctx.driver.execute_script(JS_LOOKUP["dragdrop"], from_element, to_element):
+                    self._inject_dragdrop()
+                    self.ctx.driver.execute_script(JS_LOOKUP["dragdrop"], from_element, to_element)
 
     @log_wrapper
     @keyword
@@ -661,43 +1437,104 @@ class SeleniumTestability(LibraryComponent):
         if is_blocked:
             raise AssertionError("Element with locator {} is blocked".format(locator))
 
-    def _get_ff_log(self: "SeleniumTestability", name: str) -> BrowserLogsType:
-        matcher = (
-            r"^(?P<source>JavaScript|console)(\s|\.)(?P<level>warn.*?|debug|trace|log|error|info):\s(?P<message>(?!resource:).*)$"
+    def _ff_log_tail(self: "SeleniumTestability", name: str) -> LogTail:
+        if name not in self.ff_logs:
+            self.ff_logs[name] = LogTail(name)
+        return self.ff_logs[name]
+
+    def _log_entries(
+        self: "SeleniumTestability", log_type: str, level: OptionalStrType, source: OptionalStrType, stored: bool = False
+    ) -> Iterator[LogEntry]:
+        """
+        Returns new entries of ``log_type`` filtered by ``level`` and ``source``. New browser entries are added to the
+        log store as a whole before filtering and with ``stored``, all entries retained in the store are returned instead.
+        When the log store is disabled, filters are applied already when Firefox log lines are parsed.
+        """
+        try:
+            if log_type != "browser":
+                return filter_entries(self.ctx.driver.get_log(log_type), level, source)
+            if not self.log_store_size:
+                return iter(self._log_source(self.ctx.driver, level, source)())
+            store = self.log_store()
+            entries = list(self._log_source(self.ctx.driver)())
+            store.add(entries)
+            if stored:
+                return iter(store.snapshot(level, source))
+            return filter_entries(entries, level, source)
+        except WebDriverException:
+            if not self.browser_warn_shown:
+                self.browser_warn_shown = True
+                self.warn("Current browser does not support fetching logs from the browser with log_type: {}".format(log_type))
+            return iter([])
+
+    def _log_source(
+        self: "SeleniumTestability", driver: Any, level: OptionalStrType = None, source: OptionalStrType = None
+    ) -> Callable[[], Iterable[LogEntry]]:
+        """
+        Returns a callable that returns new browser log entries of ``driver`` filtered by ``level`` and ``source``. On
+        Firefox, the tail of the log file is shared with the log collector so that each line is read only once.
+        """
+        raw_driver = getattr(driver, "wrapped_driver", driver)
+        if is_firefox(raw_driver):
+            tail = self._ff_log_tail(raw_driver.service.log_file.name)
+            return lambda: parse_firefox_log(tail.lines(), level, source)
+        if level or source:
+            return lambda: filter_entries(raw_driver.get_log("browser"), level, source)
+        return lambda: raw_driver.get_log("browser")
+
+    def log_store(self: "SeleniumTestability", driver: Any = None) -> LogStore:
+        """
+        Returns the log store of ``driver``, creating it if needed.
+        """
+        key = self._driver_key(driver or self.ctx.driver)
+        if key not in self.log_stores:
+            self.log_stores[key] = LogStore(self.log_store_size, self.log_store_quotas)
+        return self.log_stores[key]
+
+    def discard_log_store(self: "SeleniumTestability", driver: Any = None) -> None:
+        self.log_stores.pop(self._driver_key(driver or self.ctx.driver), None)
+
+    def start_log_collector(self: "SeleniumTestability", driver: Any = None, interval: OptionalStrType = None) -> None:
+        """
+        Starts a background log collector for ``driver`` unless one is already running.
+        """
+        driver = driver or self.ctx.driver
+        key = self._driver_key(driver)
+        if key in self.log_collectors and self.log_collectors[key].is_alive():
+            return
+        collector = LogCollector(
+            self._log_source(driver),
+            timestr_to_secs(interval) if interval else self.log_collector_interval,
+            self.log_store(driver),
+            self.logger,
         )
-        LEVEL_LOOKUP = {
-            "log": "INFO",
-            "warn": "WARN",
-            "warning": "WARN",
-            "error": "SEVERE",
-            "info": "INFO",
-            "trace": "SEVERE",
-            "debug": "DEBUG",
-        }
-        SOURCE_LOOKUP = {"JavaScript": "javascript", "console": "console-api"}
-        log = []
-        skip_lines = self.ff_log_pos.get(name, 0)
-        buff: BrowserLogsType = []
-        with open(name, "r") as f:
-            buff = f.read().split("\n")
-        self.ff_log_pos[name] = skip_lines + len(buff)
-        buff = buff[skip_lines:]
-
-        for line in buff:
-            matches = re.search(matcher, line)
-            if matches:
-                row = {
-                    "level": LEVEL_LOOKUP[matches.group("level")],
-                    "message": matches.group("message"),
-                    "source": SOURCE_LOOKUP[matches.group("source")],
-                    "timestamp": int(time() * 1000),
-                }
-                log.append(json.dumps(row))
-        return log
-
-    @log_wrapper
-    @keyword
-    def get_log(self: "SeleniumTestability", log_type: str = "browser") -> BrowserLogsType:
+        self.log_collectors[key] = collector
+        collector.start()
+
+    def stop_log_collector(self: "SeleniumTestability", driver: Any = None, drain: bool = True) -> None:
+        """
+        Stops background log collector of ``driver``. Collected entries are kept in the log store.
+        """
+        collector = self.log_collectors.pop(self._driver_key(driver or self.ctx.driver), None)
+        if collector is not None:
+            collector.stop(drain)
+
+    @staticmethod
+    def _output_path(filename: str) -> Path:
+        path = Path(filename)
+        if not path.is_absolute():
+            path = Path(BuiltIn().get_variable_value("${OUTPUT DIR}", ".")) / path
+        return path
+
+    @log_wrapper
+    @keyword
+    def get_log(
+        self: "SeleniumTestability",
+        log_type: str = "browser",
+        stored: bool = False,
+        level: OptionalStrType = None,
+        source: OptionalStrType = None,
+    ) -> BrowserLogsType:
         """
         Returns logs determined by ``log_type`` from the current browser. What is returned
         depends on desired_capabilities passed to `Open Browser`.
@@ -705,23 +1542,105 @@ class SeleniumTestability(LibraryComponent):
         Note: On firefox, the firefox profile has to have `devtools.console.stdout.content` property to be set.
         This can be done automatically with `Generate Firefox Profile` and then pass that to `Open Browser`.
 
+        New browser log entries are also added to the browser's log store, see `log_store_size`.
+
+        Parameters:
+        - ``log_type`` type of the log, defaults to browser
+        - ``stored`` if truthy, all entries retained in the log store are returned instead of only the new ones
+        - ``level`` minimum level of returned entries. Valid options: DEBUG, INFO, WARN, SEVERE
+        - ``source`` if set, only entries from this source are returned, for example ``console-api`` or ``javascript``
+
+        Example:
+        | ${errors}=  | `Get Log` | stored=True | level=SEVERE |
+
         This keyword will mostly likely not work with remote seleniun driver!
         """
-        ret = []  # type: BrowserLogsType
-        try:
-            if is_firefox(self.ctx.driver) and log_type == "browser":
-                ret = self._get_ff_log(self.ctx.driver.service.log_file.name)
-            else:
-                ret = self.ctx.driver.get_log(log_type)
-        except WebDriverException:
-            if not self.browser_warn_shown:
-                self.browser_warn_shown = True
-                self.warn("Current browser does not support fetching logs from the browser with log_type: {}".format(log_type))
-                return []
+        ret = list(self._log_entries(log_type, level, source, is_truthy(stored)))
         if not ret and not self.empty_log_warn_shown:
             self.empty_log_warn_shown = True
             self.warn("No logs available - you might need to enable loggingPrefs in desired_capabilities")
-        return ret
+        if log_type == "browser" and is_firefox(self.ctx.driver):
+            return [json.dumps(row) for row in ret]
+        return ret  # type: ignore
+
+    @log_wrapper
+    @keyword
+    def get_log_entries(
+        self: "SeleniumTestability", log_type: str = "browser", level: OptionalStrType = None, source: OptionalStrType = None
+    ) -> Iterator[LogEntry]:
+        """
+        Returns new log entries determined by ``log_type`` from the current browser as dictionaries with ``level``, ``message``, ``source`` and ``timestamp`` keys.
+        Unlike `Get Log`, entries are not serialized into json strings and they are filtered lazily while iterating the returned value.
+        New browser log entries are added to the browser's log store when they are fetched, see `log_store_size`.
+
+        Parameters:
+        - ``log_type`` type of the log, defaults to browser
+        - ``level`` minimum level of returned entries. Valid options: DEBUG, INFO, WARN, SEVERE
+        - ``source`` if set, only entries from this source are returned, for example ``console-api`` or ``javascript``
+
+        Example:
+        | ${entries}=  | `Get Log Entries` | level=WARN  |
+        | FOR          | ${entry}          | IN          | @{entries} |
+        |              | Log               | ${entry}[message] |     |
+        | END          |                   |             |            |
+        """
+        return self._log_entries(log_type, level, source)
+
+    @log_wrapper
+    @keyword
+    def write_log_entries(
+        self: "SeleniumTestability",
+        filename: str = "browser_log.jsonl",
+        log_type: str = "browser",
+        level: OptionalStrType = None,
+        source: OptionalStrType = None,
+    ) -> int:
+        """
+        Appends new log entries from the current browser into ``filename`` as json lines, one entry per line. Relative
+        ``filename`` is placed into ${OUTPUT DIR}. Returns the number of entries written.
+
+        See `Get Log Entries` for the rest of the parameters.
+        """
+        count = 0
+        with self._output_path(filename).open("a", encoding="utf-8") as f:
+            for entry in self._log_entries(log_type, level, source):
+                f.write(json.dumps(entry))
+                f.write("\n")
+                count += 1
+        return count
+
+    @log_wrapper
+    @keyword
+    def start_browser_log_collector(self: "SeleniumTestability", interval: OptionalStrType = None) -> None:
+        """
+        Starts a background thread that drains logs of the current browser into a buffer. See `log_collector` for details.
+        Parameters:
+        - ``interval`` how often logs are drained, robot framework timestring. Defaults to ``log_collector_interval`` plugin argument.
+        """
+        self.start_log_collector(interval=interval)
+
+    @log_wrapper
+    @keyword
+    def stop_browser_log_collector(self: "SeleniumTestability") -> None:
+        """
+        Drains the logs one more time and stops the background log collector of the current browser.
+        """
+        self.stop_log_collector()
+
+    @log_wrapper
+    @keyword
+    def get_collected_browser_logs(
+        self: "SeleniumTestability", level: OptionalStrType = None, source: OptionalStrType = None, clear: bool = False
+    ) -> List[LogEntry]:
+        """
+        Returns entries retained in the log store of the current browser as dictionaries. Entries are collected by the
+        background log collector and by `Get Log`.
+        Parameters:
+        - ``level`` minimum level of returned entries. Valid options: DEBUG, INFO, WARN, SEVERE
+        - ``source`` if set, only entries from this source are returned, for example ``console-api`` or ``javascript``
+        - ``clear`` if truthy, collected entries are removed after they are returned
+        """
+        return self.log_store().snapshot(level, source, is_truthy(clear))
 
     @log_wrapper
     @keyword
@@ -816,6 +1735,8 @@ class SeleniumTestability(LibraryComponent):
         preferences: OptionalDictType = None,
         accept_untrusted_certs: bool = False,
         proxy: OptionalStrType = None,
+        testability_extension: bool = False,
+        cached: bool = False,
     ) -> FirefoxProfile:
         """
         Generates a firefox profile that sets up few required preferences for SeleniumTestability to support all necessary features.
@@ -823,10 +1744,45 @@ class SeleniumTestability(LibraryComponent):
         - ``preferences`` - firefox profile preferences in dictionary format.
         - ``accept_untrusted_certs`` should we accept untrusted/self-signed certificates.
         - ``proxy`` proxy options
+        - ``testability_extension`` if truthy, an extension that instruments every document at document_start is installed into the profile.
+        - ``cached`` if truthy, profile generated earlier in the same process with the same arguments is returned instead of generating a new one.
+
+        Cached profiles are also packaged for the browser only once, which makes opening a lot of browsers faster. This only
+        works when the profile itself is passed to `Open Browser` with ``ff_profile_dir``, passing its ``path`` makes
+        SeleniumLibrary to create and package a new profile from the directory each time.
+        Do note that a cached profile is shared by everyone who asks for it with the same arguments, so preferences set
+        into it afterwards affect all of them. Only use ``cached`` with profiles that are not modified after generating them.
+
+        Example:
+        | ${profile}=    | `Generate Firefox Profile` | cached=True            |                           |
+        | `Open Browser` | ${URL}                     | browser=headlessfirefox | ff_profile_dir=${profile} |
+
+        With ``testability_extension``, SUT is already instrumented when the page loads, so injection is never needed and
+        asyncronous events fired during page startup are also waited for. Config set with `Set Testability Config` before
+        calling this keyword is included in the extension. Firefox release builds only load signed extensions from the profile,
+        use Developer Edition, Nightly or ESR or install the extension with `Install Testability Extension` instead.
+        Pages whose Content-Security-Policy disallows inline scripts are still instrumented with injection.
 
         Note: If you opt out using this keyword, you are not able to get logs with ``Get Logs`` and Firefox.
         """
-        profile = FirefoxProfile()
+        extension = is_truthy(testability_extension)
+        if not is_truthy(cached):
+            return self._create_firefox_profile(preferences, accept_untrusted_certs, proxy, extension)
+        key = json.dumps(
+            [preferences, is_truthy(accept_untrusted_certs), proxy, extension, self._effective_config() if extension else None],
+            sort_keys=True,
+            default=str,
+        )
+        return get_profile(key, lambda: self._create_firefox_profile(preferences, accept_untrusted_certs, proxy, extension))
+
+    def _create_firefox_profile(
+        self: "SeleniumTestability",
+        preferences: OptionalDictType,
+        accept_untrusted_certs: bool,
+        proxy: OptionalStrType,
+        extension: bool,
+    ) -> FirefoxProfile:
+        profile: FirefoxProfile = CachedFirefoxProfile()
         if preferences:
             for key, value in preferences.items():  # type: ignore
                 profile.set_preference(key, value)
@@ -838,9 +1794,49 @@ class SeleniumTestability(LibraryComponent):
         if proxy:
             profile.set_proxy(proxy)
 
+        if extension:
+            self._build_extension(Path(profile.path) / "extensions")
+            profile.set_preference("xpinstall.signatures.required", False)
+            profile.set_preference("extensions.autoDisableScopes", 0)
+            profile.set_preference("extensions.enabledScopes", 15)
+
         profile.update_preferences()
         return profile
 
+    def _build_extension(self: "SeleniumTestability", directory: Path) -> Path:
+        source = self._preload_source(json.dumps(self._effective_config()))
+        return build_extension(source, directory / "{}.xpi".format(EXTENSION_ID))
+
+    @log_wrapper
+    @keyword
+    def install_testability_extension(self: "SeleniumTestability") -> str:
+        """
+        Installs an extension that instruments every document at document_start into the current Firefox as a temporary
+        add-on, which works also with Firefox release builds. Only documents loaded after this are instrumented by the extension.
+        See ``testability_extension`` of `Generate Firefox Profile` for details. Returns the id of the extension.
+        """
+        if not is_firefox(self.ctx.driver):
+            raise RuntimeError("Testability extension can only be installed into Firefox")
+        raw_driver = getattr(self.ctx.driver, "wrapped_driver", self.ctx.driver)
+        with TemporaryDirectory() as tmp:
+            # install_addon sends the content of the file, so it is not needed after this.
+            return raw_driver.install_addon(str(self._build_extension(Path(tmp))), temporary=True)
+
+    @staticmethod
+    def _encode_storage_value(value: Any) -> str:
+        if isinstance(value, str):
+            return value
+        return json.dumps(value)
+
+    @staticmethod
+    def _decode_storage_value(value: Any) -> Any:
+        if isinstance(value, str) and re.match(r"^({.*}|\[.*\])$", value, re.DOTALL):
+            try:
+                return json.loads(value)
+            except ValueError:
+                pass
+        return value
+
     @log_wrapper
     @keyword
     def get_storage_length(self: "SeleniumTestability", storage_type: str = "localStorage") -> int:
@@ -866,29 +1862,32 @@ class SeleniumTestability(LibraryComponent):
     def get_storage_item(self: "SeleniumTestability", key: str, storage_type: str = "localStorage") -> StorageType:
         """
         Returns value of ``key`` from specified storage.
+
+        Storage only holds strings and `Set Storage Item` stores all values that are not strings as json. Values that are
+        json objects or arrays are decoded into dictionaries and lists, all other values, including numbers and booleans,
+        are returned as strings.
         Parameters:
         - ``key`` name of the storage key
         - ``storage_type`` name of the storage. Valid options: localStorage, sessionStorage
         """
-        matcher = r"^{.*}$"
         storage_item = self.ctx.driver.execute_script(JS_LOOKUP["storage_getitem"], storage_type, key)
-        if isinstance(storage_item, str) and re.match(matcher, storage_item):
-            storage_item = json.loads(storage_item)
-        return storage_item
+        return self._decode_storage_value(storage_item)
 
     @log_wrapper
     @keyword
     def set_storage_item(self: "SeleniumTestability", key: str, value: StorageType, storage_type: str = "localStorage") -> None:
         """
         Sets a value to the key in specified storage_type
+
+        Strings are stored as they are and all other values as json, so ``${1}`` is stored as ``1`` and ``${True}``
+        as ``true``. Only dictionaries and lists are turned back into the same type by `Get Storage Item`, numbers,
+        booleans and None come back as strings.
         Parameters:
         - ``key`` name of the key
         - ``value`` value that should be set to key
         - ``storage_type`` name of the storage. Valid options: localStorage, sessionStorage
         """
-        if isinstance(value, dict):
-            value = json.dumps(value)
-        self.ctx.driver.execute_script(JS_LOOKUP["storage_setitem"], storage_type, key, value)
+        self.ctx.driver.execute_script(JS_LOOKUP["storage_setitem"], storage_type, key, self._encode_storage_value(value))
 
     @log_wrapper
     @keyword
@@ -911,6 +1910,128 @@ class SeleniumTestability(LibraryComponent):
         """
         return self.ctx.driver.execute_script(JS_LOOKUP["storage_removeitem"], storage_type, key)
 
+    @log_wrapper
+    @keyword
+    def get_storage_items(
+        self: "SeleniumTestability", keys: OptionalListType = None, storage_type: str = "localStorage"
+    ) -> StorageItemsType:
+        """
+        Returns a dictionary of ``keys`` and their values from specified storage with a single script execution.
+        Values are decoded the same way as in `Get Storage Item`: json objects and arrays are returned as dictionaries and
+        lists, everything else as strings. Keys that are not in the storage have None as the value.
+        Parameters:
+        - ``keys`` list of storage keys. All keys are returned if not given
+        - ``storage_type`` name of the storage. Valid options: localStorage, sessionStorage
+
+        Example:
+        | ${items}= | `Get Storage Items` | ${{["token", "settings"]}} |
+        | ${all}= | `Get Storage Items` | storage_type=sessionStorage |
+        """
+        items = self.ctx.driver.execute_script(JS_LOOKUP["storage_getitems"], storage_type, keys)
+        return {key: self._decode_storage_value(value) for key, value in items.items()}
+
+    @log_wrapper
+    @keyword
+    def set_storage_items(self: "SeleniumTestability", items: StorageItemsType, storage_type: str = "localStorage") -> None:
+        """
+        Sets all keys and values of ``items`` dictionary to specified storage with a single script execution.
+        Values are encoded the same way as in `Set Storage Item`: strings as they are and everything else as json. Only
+        dictionaries and lists round trip through `Get Storage Items`, numbers and booleans are read back as strings.
+        Parameters:
+        - ``items`` dictionary of keys and values
+        - ``storage_type`` name of the storage. Valid options: localStorage, sessionStorage
+
+        Example:
+        | `Set Storage Items` | ${{{"token": "abc", "settings": {"theme": "dark"}}}} |
+        """
+        encoded = {key: self._encode_storage_value(value) for key, value in items.items()}
+        self.ctx.driver.execute_script(JS_LOOKUP["storage_setitems"], storage_type, encoded)
+
+    @log_wrapper
+    @keyword
+    def get_storage_snapshot(self: "SeleniumTestability", storage_types: OptionalListType = None) -> StorageSnapshotType:
+        """
+        Returns contents of given storages as dictionary of storage type to dictionary of keys and values. Values are
+        returned as stored in the browser, without decoding, so that the snapshot can be restored exactly with
+        `Restore Storage Snapshot`.
+        Parameters:
+        - ``storage_types`` list of storage names. Valid options: localStorage, sessionStorage. Both by default
+
+        Example:
+        | ${snapshot}= | `Get Storage Snapshot` |
+        | `Restore Storage Snapshot` | ${snapshot} |
+        """
+        if storage_types is None:
+            storage_types = list(self.STORAGE_TYPES)
+        return self.ctx.driver.execute_script(JS_LOOKUP["storage_snapshot"], storage_types)
+
+    @log_wrapper
+    @keyword
+    def restore_storage_snapshot(self: "SeleniumTestability", snapshot: StorageSnapshotType, clear: bool = True) -> None:
+        """
+        Restores storages from ``snapshot`` returned by `Get Storage Snapshot` with a single script execution.
+        Parameters:
+        - ``snapshot`` dictionary of storage type to dictionary of keys and values
+        - ``clear`` if true, storages in the snapshot are cleared before the values are set
+        """
+        storages = {name: items for name, items in snapshot.items() if name in self.STORAGE_TYPES}
+        self.ctx.driver.execute_script(JS_LOOKUP["storage_restore"], storages, clear)
+
+    @log_wrapper
+    @keyword
+    def save_storage_snapshot(self: "SeleniumTestability", filename: str = "storage_snapshot.json", cookies: bool = False) -> str:
+        """
+        Writes localStorage and sessionStorage of the current page, and optionally cookies, into ``filename`` as json
+        so that the state can be restored later, even into a new browser, with `Restore Storage Snapshot From File`.
+        Relative ``filename`` is placed into ${OUTPUT DIR}. Returns the path of the written file.
+        Parameters:
+        - ``filename`` name of the snapshot file
+        - ``cookies`` if true, cookies visible to the current page are included
+
+        Example:
+        | `Log In As` | admin |
+        | `Save Storage Snapshot` | admin.json | cookies=True |
+        """
+        snapshot: Dict[str, Any] = self.get_storage_snapshot()
+        snapshot["origin"] = self.ctx.driver.execute_script(JS_LOOKUP["get_window_location"], "origin")
+        if is_truthy(cookies):
+            snapshot["cookies"] = self.ctx.driver.get_cookies()
+        path = self._output_path(filename)
+        with path.open("w", encoding="utf-8") as f:
+            json.dump(snapshot, f, indent=2)
+        return str(path)
+
+    @log_wrapper
+    @keyword
+    def restore_storage_snapshot_from_file(
+        self: "SeleniumTestability", filename: str = "storage_snapshot.json", url: OptionalStrType = None, clear: bool = True
+    ) -> None:
+        """
+        Restores storages and cookies written by `Save Storage Snapshot`. Storages are restored with a single script
+        execution. Relative ``filename`` is read from ${OUTPUT DIR}.
+
+        Storages and cookies can only be set for the page that is open, so if the browser is not on the origin the
+        snapshot was taken from, like a freshly opened browser, ``url`` or the origin itself is opened first. Page
+        is not reloaded afterwards, so open the page under test after restoring.
+        Parameters:
+        - ``filename`` name of the snapshot file
+        - ``url`` page to open if browser is not on the origin of the snapshot
+        - ``clear`` if true, storages are cleared before the values are set
+
+        Example:
+        | `Open Browser` | about:blank | Firefox |
+        | `Restore Storage Snapshot From File` | admin.json |
+        | `Go To` | ${URL}/dashboard |
+        """
+        with self._output_path(filename).open("r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+        origin = snapshot.get("origin")
+        if origin and self.ctx.driver.execute_script(JS_LOOKUP["get_window_location"], "origin") != origin:
+            self.ctx.driver.get(url or origin)
+        for cookie in snapshot.get("cookies", []):
+            self.ctx.driver.add_cookie(cookie)
+        self.restore_storage_snapshot(snapshot, clear)
+
     @log_wrapper
     @keyword
     def right_click_element(self: "SeleniumTestability", locator: LocatorType) -> None:
@@ -17,10 +17,13 @@ LocatorType = Union[WebElementType, EventFiringWebElement, str]
 OptionalBoolType = Optional[bool]
 OptionalStrType = Optional[str]
 OptionalDictType = Optional[Dict]
+OptionalListType = Optional[List]
 BrowserLogsType = List[str]
 StringArray = List[str]
 FirefoxWebDriverType = Union[Firefox, EventFiringWebDriver]
-StorageType = Union[Dict, bool, str, int, float]
+StorageType = Union[Dict, List, bool, str, int, float]
+StorageItemsType = Dict[str, StorageType]
+StorageSnapshotType = Dict[str, Dict[str, str]]
 
 
 def is_firefox(webdriver: FirefoxWebDriverType) -> bool:
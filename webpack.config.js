@@ -2,9 +2,14 @@ const path = require('path');
 const webpack = require('webpack');
 module.exports = {
   mode: 'production',
-  entry: './assets/build.js',
+  entry: {
+    testability: './assets/build.js',
+    core: './assets/core.js',
+    scroll: './assets/scroll.js',
+    dragdrop: './assets/dragdrop.js'
+  },
   output: {
-    filename: 'testability.js',
+    filename: '[name].js',
     path: path.resolve(__dirname, 'src', 'SeleniumTestability', 'js')
   },
   plugins: [],